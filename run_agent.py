@@ -9,152 +9,818 @@ Usage:
     python run_agent.py --dry-run          # Test without Windows connection
     python run_agent.py --compression 60   # 1 real minute = 1 simulated hour
     python run_agent.py --profile alex_marketing.json
+    python run_agent.py --profile a.json,b.json  # Run several profiles in parallel
+    python run_agent.py --serve            # Keep a warm daemon for later runs
+    python run_agent.py --client           # Run in that daemon if it is listening
+    python run_agent.py --quiet            # Skip the startup banner
 
 Environment Variables:
     ANTHROPIC_API_KEY  - Required for LLM-based decisions (future)
     SEDT_WINDOWS_HOST  - Windows VM IP (default: 192.168.1.100)
     SEDT_WINDOWS_USER  - Windows SSH user (default: analyst)
+    SEDT_SSH_BACKEND   - SSH transport: subprocess, hussh, paramiko or ssh2 (default: subprocess)
+    SEDT_SSH_POOL_SIZE - Persistent SSH connections for pooled backends (default: 1)
+    SEDT_MAX_SSH_SESSIONS - Maximum SSH commands in flight (default: 10)
+    SEDT_DAEMON        - Set to 1 to run in the daemon, like --client
+    SEDT_DAEMON_SOCKET - Daemon socket path (default: $XDG_RUNTIME_DIR/sedt/daemon.sock,
+                         or /tmp/sedt-<uid>/daemon.sock)
+    SEDT_SEED          - Seed for reproducible activity choices (default: random)
 """
 
-import argparse
+import hashlib
+import json
 import logging
 import os
+import pickle
+import signal
+import stat
 import sys
-from datetime import datetime
+import threading
+import time as _time
+from contextlib import contextmanager
+from dataclasses import replace
+from datetime import date, datetime, time, timedelta
 from pathlib import Path
+from types import MappingProxyType, SimpleNamespace
+from typing import Optional
 
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent / "src"))
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
 
-from core import DetectionSimAgent, SimulationConfig
+_HERE = Path(__file__).resolve().parent
+_SRC = str(_HERE / "src")
+_SEP = "=" * 60
+_ENV = os.environ
+# Daemon socket, in a directory only this user can enter
+_DAEMON_SOCKET = _ENV.get("SEDT_DAEMON_SOCKET") or (
+    f"{_ENV['XDG_RUNTIME_DIR']}/sedt/daemon.sock" if _ENV.get("XDG_RUNTIME_DIR")
+    else f"/tmp/sedt-{os.getuid()}/daemon.sock"
+)
+# Client environment variables a daemon run uses in place of its own
+_FORWARDED_ENV_PREFIXES = ("SEDT_", "ANTHROPIC_")
+_LOG_FORMAT = '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
+_CACHE_DIR = Path(_ENV.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "sedt"
+
+
+class _ClockFormatter(logging.Formatter):
+    """Formatter that renders asctime as HH:MM:SS without strftime."""
+
+    def formatTime(self, record, datefmt=None):
+        lt = _time.localtime(record.created)
+        return f"{lt.tm_hour:02d}:{lt.tm_min:02d}:{lt.tm_sec:02d}"
+
+
+class _StderrBytesHandler(logging.Handler):
+    """Handler that writes pre-encoded records to the binary stderr stream."""
+
+    def __init__(self):
+        super().__init__()
+        self._stream = getattr(sys.stderr, "buffer", None)
+
+    def emit(self, record):
+        try:
+            msg = self.format(record)
+            if self._stream is None:
+                sys.stderr.write(msg + "\n")
+                return
+            self._stream.write(msg.encode("utf-8", "backslashreplace") + b"\n")
+            self._stream.flush()
+        except Exception:
+            self.handleError(record)
 
 
 def setup_logging(verbose: bool = False):
-    """Configure logging."""
-    level = logging.DEBUG if verbose else logging.INFO
-    logging.basicConfig(
-        level=level,
-        format='%(asctime)s [%(levelname)s] %(name)s: %(message)s',
-        datefmt='%H:%M:%S'
-    )
+    """
+    Configure logging.
 
+    Records are written as bytes to stderr. With verbose output, formatting
+    and writing move to a background thread fed through a queue.
+    """
+    handler = _StderrBytesHandler()
+    handler.setFormatter(_ClockFormatter(_LOG_FORMAT))
+    root = logging.getLogger()
+    root.setLevel(logging.DEBUG if verbose else logging.INFO)
+
+    if not verbose:
+        root.addHandler(handler)
+        return
+
+    import atexit
+    import queue
+    from logging.handlers import QueueHandler, QueueListener
+
+    queue_handler = QueueHandler(queue.SimpleQueue())
+    listener = QueueListener(queue_handler.queue, handler)
+    listener.start()
+    atexit.register(listener.stop)
+    root.addHandler(queue_handler)
+
+    def _log_directly():
+        # The listener thread does not survive fork
+        root.removeHandler(queue_handler)
+        root.addHandler(handler)
+
+    os.register_at_fork(after_in_child=_log_directly)
+
+
+def _parse_hhmm(value: str) -> time:
+    """Parse an HH:MM string without going through strptime."""
+    hh, mm = value.split(":", 1)
+    return time(int(hh), int(mm))
+
+
+def _ssh_backend(value: str) -> str:
+    """Validate an --ssh-backend value (mirrors remote_executor.SSH_BACKENDS)."""
+    if value not in ("subprocess", "hussh", "paramiko", "ssh2"):
+        raise ValueError(value)
+    return value
+
+
+# Readable names for custom option types in argparse error messages
+_TYPE_NAMES = {_parse_hhmm: "HH:MM", _ssh_backend: "SSH backend"}
+
+
+# Command-line options: (flag, dest, type, help). A type of None marks a
+# boolean switch. Shared by the fast parser and the argparse fallback.
+_OPTIONS = (
+    ("--profile", "profile", str, "Path to worker profile JSON"),
+    ("--compression", "compression", float,
+     "Time compression factor (60 = 1 real min = 1 sim hour)"),
+    ("--dry-run", "dry_run", None, "Don't connect to Windows VM, just simulate decisions"),
+    ("--start-time", "start_time", _parse_hhmm, "Simulation start time (HH:MM format, default: 09:00)"),
+    ("--end-time", "end_time", _parse_hhmm, "Simulation end time (HH:MM format, default: 17:00)"),
+    ("--windows-host", "windows_host", str, "Windows VM IP address"),
+    ("--windows-user", "windows_user", str, "Windows SSH username"),
+    ("--verbose", "verbose", None, "Enable debug logging"),
+    ("--quiet", "quiet", None, "Skip the startup banner"),
+    ("--ssh-backend", "ssh_backend", _ssh_backend,
+     "SSH transport: subprocess (default), or hussh, paramiko or ssh2 "
+     "(pooled persistent connections)"),
+    ("--ssh-pool-size", "ssh_pool_size", int,
+     "Persistent SSH connections kept open by pooled backends (env: SEDT_SSH_POOL_SIZE)"),
+    ("--max-ssh-sessions", "max_ssh_sessions", int,
+     "Maximum SSH commands in flight at once (env: SEDT_MAX_SSH_SESSIONS)"),
+    ("--batch-size", "batch_size", int,
+     "Actions sent to the Windows VM per round-trip (default: 1, no batching)"),
+    ("--batch-window-seconds", "batch_window_seconds", float,
+     "Longest real time an action may wait for its batch to fill (default: 5)"),
+    ("--sample-batch", "sample_batch", int,
+     "Activities pre-drawn per weighted sample (default: 1)"),
+    ("--event-driven", "event_driven", None,
+     "Skip real waits for off-hours and scheduled idle time"),
+    ("--serve", "serve", None, "Run as a resident daemon that executes forwarded runs"),
+    ("--client", "client", None,
+     "Run in the --serve daemon if one is listening (env: SEDT_DAEMON=1)"),
+)
+_SHORT_FLAGS = MappingProxyType({"-v": "--verbose", "-q": "--quiet"})
+_OPTIONS_BY_FLAG = MappingProxyType({opt[0]: opt for opt in _OPTIONS})
+
+_DEFAULTS = MappingProxyType({
+    "profile": "config/profiles/alex_marketing.json",
+    "compression": 60.0,
+    "dry_run": False,
+    "start_time": None,
+    "end_time": None,
+    "windows_host": None,  # None: taken from _ENV_DEFAULTS
+    "windows_user": None,
+    "ssh_backend": None,
+    "ssh_pool_size": None,
+    "max_ssh_sessions": None,
+    "batch_size": 1,
+    "batch_window_seconds": 5.0,
+    "sample_batch": 1,
+    "event_driven": False,
+    "verbose": False,
+    "quiet": False,
+    "serve": False,
+    "client": False,
+})
+
+
+# Options defaulting to an environment variable: dest -> (variable, type,
+# fallback). Read when arguments are parsed rather than at import, so a
+# bad value is reported as a usage error
+_ENV_DEFAULTS = MappingProxyType({
+    "windows_host": ("SEDT_WINDOWS_HOST", str, "192.168.1.100"),  # NOSEC
+    "windows_user": ("SEDT_WINDOWS_USER", str, "analyst"),
+    "ssh_backend": ("SEDT_SSH_BACKEND", _ssh_backend, "subprocess"),
+    "ssh_pool_size": ("SEDT_SSH_POOL_SIZE", int, 1),
+    "max_ssh_sessions": ("SEDT_MAX_SSH_SESSIONS", int, 10),
+})
+
+
+def _usage_error(message: str):
+    """Exit with an argparse-style usage error (status 2)."""
+    sys.stderr.write(f"usage: run_agent.py [options]\nrun_agent.py: error: {message}\n")
+    sys.stderr.flush()
+    sys.exit(2)
+
+
+def _fill_env_defaults(args):
+    """Give options not set on the command line their environment default."""
+    for dest, (variable, type_, fallback) in _ENV_DEFAULTS.items():
+        if getattr(args, dest) is not None:
+            continue
+        raw = _ENV.get(variable)
+        if raw is None:
+            value = fallback
+        else:
+            try:
+                value = type_(raw)
+            except ValueError:
+                _usage_error(f"invalid {variable} value: {raw!r}")
+        setattr(args, dest, value)
+    return args
+
+
+def _build_help() -> bytes:
+    """Render --help output from the option table and the module docstring."""
+    rows = [("-h, --help", "Show this help message and exit")]
+    for flag, dest, type_, help_text in _OPTIONS:
+        names = ", ".join(
+            [short for short, long in _SHORT_FLAGS.items() if long == flag] + [flag]
+        )
+        if type_ is not None:
+            names += " " + dest.upper()
+        rows.append((names, help_text))
+
+    width = min(max(len(names) for names, _ in rows) + 2, 24)
+    lines = [
+        "usage: run_agent.py [options]",
+        "",
+        "SEDT - Simulated Enterprise Detection Testing",
+        "",
+        "options:",
+    ]
+    for names, help_text in rows:
+        if len(names) + 2 > width:
+            lines.append(f"  {names}")
+            lines.append(f"  {'':<{width}}{help_text}")
+        else:
+            lines.append(f"  {names:<{width}}{help_text}")
+    return ("\n".join(lines) + "\n" + __doc__).encode("utf-8")
+
+
+_HELP_BYTES = _build_help()
+
+
+def _slow_parse(argv: list) -> "argparse.Namespace":
+    """Parse arguments with argparse (unknown flags, bad values)."""
+    import argparse
 
-def main():
     parser = argparse.ArgumentParser(
         description="SEDT - Simulated Enterprise Detection Testing",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog=__doc__
+        add_help=False
     )
+    # Registered under readable names so conversion errors don't show
+    # the helper function names
+    for type_, name in _TYPE_NAMES.items():
+        parser.register("type", name, type_)
+    for flag, dest, type_, help_text in _OPTIONS:
+        flags = [short for short, long in _SHORT_FLAGS.items() if long == flag] + [flag]
+        type_ = _TYPE_NAMES.get(type_, type_)
+        if type_ is None:
+            parser.add_argument(*flags, dest=dest, action="store_true", help=help_text)
+        else:
+            parser.add_argument(
+                *flags, dest=dest, type=type_, default=_DEFAULTS[dest], help=help_text
+            )
+    return _fill_env_defaults(parser.parse_args(argv))
 
-    parser.add_argument(
-        "--profile",
-        default="config/profiles/alex_marketing.json",
-        help="Path to worker profile JSON"
-    )
-    parser.add_argument(
-        "--compression",
-        type=float,
-        default=60.0,
-        help="Time compression factor (60 = 1 real min = 1 sim hour)"
-    )
-    parser.add_argument(
-        "--dry-run",
-        action="store_true",
-        help="Don't connect to Windows VM, just simulate decisions"
-    )
-    parser.add_argument(
-        "--start-time",
-        help="Simulation start time (HH:MM format, default: 09:00)"
-    )
-    parser.add_argument(
-        "--end-time",
-        help="Simulation end time (HH:MM format, default: 17:00)"
-    )
-    parser.add_argument(
-        "--windows-host",
-        default=os.environ.get("SEDT_WINDOWS_HOST", "192.168.1.100"),
-        help="Windows VM IP address"
-    )
-    parser.add_argument(
-        "--windows-user",
-        default=os.environ.get("SEDT_WINDOWS_USER", "analyst"),
-        help="Windows SSH username"
-    )
-    parser.add_argument(
-        "-v", "--verbose",
-        action="store_true",
-        help="Enable debug logging"
+
+def parse_args(argv: list) -> SimpleNamespace:
+    """
+    Parse command-line arguments.
+
+    Handles the common case with a plain scan over argv and only falls back
+    to argparse for unknown flags or values that fail conversion. --help
+    prints prebuilt text.
+
+    Args:
+        argv: Arguments excluding the program name
+
+    Returns:
+        Namespace with one attribute per option
+    """
+    if "-h" in argv or "--help" in argv:
+        sys.stdout.buffer.write(_HELP_BYTES)
+        sys.stdout.buffer.flush()
+        sys.exit(0)
+
+    values = dict(_DEFAULTS)
+    i = 0
+    while i < len(argv):
+        token = argv[i]
+        flag, sep, inline = token.partition("=")
+        flag = _SHORT_FLAGS.get(flag, flag)
+        option = _OPTIONS_BY_FLAG.get(flag)
+        if option is None:
+            return _slow_parse(argv)
+
+        _, dest, type_, _ = option
+        if type_ is None:
+            if sep:
+                return _slow_parse(argv)
+            values[dest] = True
+        else:
+            if sep:
+                raw = inline
+            elif i + 1 < len(argv):
+                i += 1
+                raw = argv[i]
+            else:
+                return _slow_parse(argv)
+            try:
+                values[dest] = type_(raw)
+            except ValueError:
+                return _slow_parse(argv)
+        i += 1
+
+    return _fill_env_defaults(SimpleNamespace(**values))
+
+
+def _load_profile_cached(path: Path) -> dict:
+    """
+    Load a worker profile, reusing a pickled copy from earlier runs.
+
+    The cache entry is keyed on the path, mtime and size of the profile, so
+    editing the JSON invalidates it. Cache I/O errors fall back to parsing.
+
+    Args:
+        path: Path to the worker profile JSON file
+
+    Returns:
+        Parsed profile dictionary
+    """
+    st = path.stat()
+    cache_key = f"{path}:{st.st_mtime_ns}:{st.st_size}"
+    cache_file = _CACHE_DIR / f"{hashlib.blake2b(cache_key.encode()).hexdigest()[:16]}.pkl"
+
+    try:
+        with open(cache_file, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        pass
+
+    profile = _loads(path.read_bytes())
+
+    try:
+        _CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(cache_file, "wb") as f:
+            pickle.dump(profile, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        logging.getLogger("sedt").debug("Could not write profile cache: %s", e)
+
+    return profile
+
+
+def _should_banner(args: SimpleNamespace) -> bool:
+    """Only show the startup banner to an interactive terminal."""
+    return not args.quiet and sys.stderr.isatty()
+
+
+def _emit_banner(logger: logging.Logger, args: SimpleNamespace, profile_paths: list):
+    """Log the startup banner."""
+    logger.info(_SEP)
+    logger.info("SEDT - Simulated Enterprise Detection Testing")
+    logger.info(_SEP)
+    logger.info("Profile: %s", ", ".join(path.name for path in profile_paths))
+    logger.info("Time compression: %sx", args.compression)
+    logger.info("Mode: %s", "DRY RUN" if args.dry_run else "LIVE")
+    if not args.dry_run:
+        logger.info("Windows VM: %s", args.windows_host)
+    logger.info(_SEP)
+
+
+# Stop event shared with the parent, set in pool workers by _init_worker
+_worker_stop = None
+
+
+def _init_worker(stop_event):
+    """
+    Set up a pool worker: stop with the parent's stop_event, and leave
+    SIGINT to the parent, which sets that event.
+    """
+    global _worker_stop
+    _worker_stop = stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _run_one(config):
+    """
+    Run one profile's simulation in a worker process.
+
+    Args:
+        config: SimulationConfig without a stop_event
+
+    Returns:
+        SimulationStats for the run
+    """
+    from core import DetectionSimAgent
+
+    return DetectionSimAgent(replace(config, stop_event=_worker_stop)).run()
+
+
+def _run_parallel(configs: list, logger: logging.Logger):
+    """
+    Run several profiles at once, one forked worker per profile.
+
+    The first Ctrl+C stops every run after its current step, keeping
+    their statistics; a second one terminates the workers.
+
+    Args:
+        configs: SimulationConfig per profile
+        logger: Logger for interruption messages
+
+    Returns:
+        SimulationStats summed over the runs that finished
+    """
+    import multiprocessing
+    from collections import Counter
+    from core import SimulationStats
+
+    ctx = multiprocessing.get_context("fork")
+    stop_event = ctx.Event()
+
+    # Threading events do not survive pickling; workers share stop_event
+    configs = [replace(config, stop_event=None) for config in configs]
+    results = []
+    pool = ctx.Pool(len(configs), initializer=_init_worker, initargs=(stop_event,))
+    try:
+        runs = pool.imap_unordered(_run_one, configs)
+        try:
+            for stats in runs:
+                results.append(stats)
+        except KeyboardInterrupt:
+            logger.info("Interrupted by user, stopping (Ctrl+C again to exit now)")
+            stop_event.set()
+            for stats in runs:
+                results.append(stats)
+        pool.close()
+    except KeyboardInterrupt:
+        logger.info("Terminating workers")
+        pool.terminate()
+    finally:
+        pool.join()
+
+    if len(results) < len(configs):
+        logger.warning("%d of %d runs did not finish", len(configs) - len(results), len(configs))
+
+    action_counts = Counter()
+    for stats in results:
+        action_counts.update(stats.action_counts)
+
+    return SimulationStats(
+        total_decisions=sum(s.total_decisions for s in results),
+        actions_executed=sum(s.actions_executed for s in results),
+        actions_failed=sum(s.actions_failed for s in results),
+        simulated_duration=sum((s.simulated_duration for s in results), timedelta()),
+        real_duration=max((s.real_duration for s in results), default=timedelta()),
+        action_counts=dict(action_counts),
     )
 
-    args = parser.parse_args()
 
-    setup_logging(args.verbose)
-    logger = logging.getLogger("sedt")
+def _run_simulation(args: SimpleNamespace, logger: logging.Logger):
+    """
+    Build the configuration for parsed arguments and run the simulation.
 
-    # Resolve profile path
-    profile_path = Path(args.profile)
-    if not profile_path.is_absolute():
-        profile_path = Path(__file__).parent / profile_path
+    A comma-separated --profile runs each profile in its own process.
 
-    if not profile_path.exists():
-        logger.error(f"Profile not found: {profile_path}")
-        sys.exit(1)
+    Args:
+        args: Parsed command-line arguments
+        logger: Logger for the banner and summary
+
+    Returns:
+        SimulationStats for the run, including runs stopped by SIGINT
+
+    Raises:
+        FileNotFoundError: If a profile does not exist
+    """
+    # Resolve profile paths
+    profile_paths = []
+    for profile in args.profile.split(","):
+        if os.path.isabs(profile):
+            profile_path = Path(profile)
+        else:
+            profile_path = _HERE / profile
+
+        if not profile_path.exists():
+            raise FileNotFoundError(f"Profile not found: {profile_path}")
+        profile_paths.append(profile_path)
+
+    # Import the agent stack only once the arguments are known to be usable
+    try:
+        from core import DetectionSimAgent, SimulationConfig
+    except ImportError:
+        if _SRC not in sys.path:
+            sys.path.insert(0, _SRC)
+        from core import DetectionSimAgent, SimulationConfig
 
     # Parse times
-    today = datetime.now().date()
+    today = date.today()
     start_time = None
     end_time = None
 
     if args.start_time:
-        start_time = datetime.combine(
-            today,
-            datetime.strptime(args.start_time, "%H:%M").time()
-        )
+        start_time = datetime.combine(today, args.start_time)
     if args.end_time:
-        end_time = datetime.combine(
-            today,
-            datetime.strptime(args.end_time, "%H:%M").time()
-        )
+        end_time = datetime.combine(today, args.end_time)
 
     # Create configuration
-    config = SimulationConfig(
-        profile_path=str(profile_path),
-        time_compression=args.compression,
-        start_time=start_time,
-        end_time=end_time,
-        dry_run=args.dry_run,
-        windows_host=args.windows_host,
-        windows_user=args.windows_user,
-    )
+    configs = [
+        SimulationConfig(
+            profile_path=str(profile_path),
+            profile_data=_load_profile_cached(profile_path),
+            time_compression=args.compression,
+            start_time=start_time,
+            end_time=end_time,
+            dry_run=args.dry_run,
+            windows_host=args.windows_host,
+            windows_user=args.windows_user,
+            ssh_backend=args.ssh_backend,
+            ssh_pool_size=args.ssh_pool_size,
+            max_ssh_sessions=args.max_ssh_sessions,
+            batch_size=args.batch_size,
+            batch_window_seconds=args.batch_window_seconds,
+            sample_batch=args.sample_batch,
+            event_driven=args.event_driven,
+            stop_event=threading.Event(),
+        )
+        for profile_path in profile_paths
+    ]
+
+    if _should_banner(args):
+        _emit_banner(logger, args, profile_paths)
+
+    if len(configs) > 1:
+        stats = _run_parallel(configs, logger)
+    else:
+        # Create and run agent
+        config = configs[0]
+        agent = DetectionSimAgent(config)
+
+        previous_handler = _install_stop_handler(config.stop_event, logger)
+        try:
+            stats = agent.run()
+        finally:
+            if previous_handler is not None:
+                signal.signal(signal.SIGINT, previous_handler)
+
+    logger.info(_SEP)
+    logger.info("Simulation Complete")
+    logger.info(_SEP)
+    logger.info("Total decisions: %s", stats.total_decisions)
+    logger.info("Actions executed: %s", stats.actions_executed)
+    logger.info("Actions failed: %s", stats.actions_failed)
+    logger.info("Simulated time: %s", stats.simulated_duration)
+    logger.info("Real time: %s", stats.real_duration)
+    logger.info("Action breakdown: %s", stats.action_counts)
+    return stats
+
+
+def _install_stop_handler(stop_event: threading.Event, logger: logging.Logger):
+    """
+    Route SIGINT to stop_event so the agent can finish its current step
+    and flush pending actions. A second SIGINT exits immediately.
+
+    Returns:
+        The previous SIGINT handler, or None if not on the main thread
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return None
+
+    def _on_sigint(signum, frame):
+        if stop_event.is_set():
+            os._exit(130)
+        logger.info("Interrupted by user, stopping (Ctrl+C again to exit now)")
+        stop_event.set()
+
+    return signal.signal(signal.SIGINT, _on_sigint)
+
+
+# ==================== Daemon Mode ====================
+
+def _send_frame(sock, payload: dict):
+    """Send a length-prefixed JSON message."""
+    data = json.dumps(payload).encode("utf-8")
+    sock.sendall(len(data).to_bytes(4, "big") + data)
+
+
+def _recv_frame(sock) -> Optional[dict]:
+    """Receive a length-prefixed JSON message, or None if the peer closed."""
+    header = _recv_exact(sock, 4)
+    if header is None:
+        return None
+    data = _recv_exact(sock, int.from_bytes(header, "big"))
+    if data is None:
+        return None
+    return _loads(data)
 
-    logger.info("=" * 60)
-    logger.info("SEDT - Simulated Enterprise Detection Testing")
-    logger.info("=" * 60)
-    logger.info(f"Profile: {profile_path.name}")
-    logger.info(f"Time compression: {args.compression}x")
-    logger.info(f"Mode: {'DRY RUN' if args.dry_run else 'LIVE'}")
-    if not args.dry_run:
-        logger.info(f"Windows VM: {args.windows_host}")
-    logger.info("=" * 60)
 
-    # Create and run agent
-    agent = DetectionSimAgent(config)
+def _recv_exact(sock, n: int) -> Optional[bytes]:
+    """Read exactly n bytes from a socket."""
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            return None
+        buf += chunk
+    return bytes(buf)
 
+
+class _ClientLogHandler(logging.Handler):
+    """Sends a daemon run's log records to the client that requested it."""
+
+    def __init__(self, sock):
+        super().__init__()
+        self._sock = sock
+        self._pid = os.getpid()
+        self.setFormatter(_ClockFormatter(_LOG_FORMAT))
+
+    def emit(self, record):
+        # Forked workers (several profiles) log to the daemon's stderr only
+        if self._sock is None or os.getpid() != self._pid:
+            return
+        try:
+            _send_frame(self._sock, {"log": self.format(record)})
+        except OSError:
+            self._sock = None  # Client went away; stop forwarding
+        except Exception:
+            self.handleError(record)
+
+
+def _check_private_dir(path: Path):
+    """
+    Make sure the socket directory is not writable by other users.
+
+    Raises:
+        PermissionError: If it is not a directory owned by this user, or is
+            group- or world-writable
+    """
+    st = os.lstat(path)
+    if (not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid()
+            or st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)):
+        raise PermissionError(
+            f"{path} must be a directory owned by this user and not writable by others"
+        )
+
+
+@contextmanager
+def _client_context(request: dict):
+    """Run a request in the client's working directory and environment."""
+    saved_cwd = os.getcwd()
+    saved_env = {k: v for k, v in _ENV.items() if k.startswith(_FORWARDED_ENV_PREFIXES)}
+    client_env = {
+        k: v for k, v in request.get("env", {}).items()
+        if isinstance(k, str) and isinstance(v, str) and k.startswith(_FORWARDED_ENV_PREFIXES)
+    }
     try:
-        stats = agent.run()
-        logger.info("=" * 60)
-        logger.info("Simulation Complete")
-        logger.info("=" * 60)
-        logger.info(f"Total decisions: {stats.total_decisions}")
-        logger.info(f"Actions executed: {stats.actions_executed}")
-        logger.info(f"Actions failed: {stats.actions_failed}")
-        logger.info(f"Simulated time: {stats.simulated_duration}")
-        logger.info(f"Real time: {stats.real_duration}")
-        logger.info(f"Action breakdown: {stats.action_counts}")
+        for key in saved_env:
+            del _ENV[key]
+        _ENV.update(client_env)
+        os.chdir(request.get("cwd") or saved_cwd)
+        yield
+    finally:
+        os.chdir(saved_cwd)
+        for key in client_env:
+            _ENV.pop(key, None)
+        _ENV.update(saved_env)
+
 
+def _serve(logger: logging.Logger):
+    """
+    Keep the interpreter resident and run simulations sent by clients.
+
+    Listens on a Unix socket that only this user can reach. Each request
+    is the argv list of a run_agent.py invocation plus the client's working
+    directory and SEDT_/ANTHROPIC_ variables; the run's log lines are sent
+    back as it goes, followed by its statistics. Requests are handled one
+    at a time.
+    """
+    import socket
+
+    socket_dir = Path(_DAEMON_SOCKET).parent
+    try:
+        socket_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        _check_private_dir(socket_dir)
+    except OSError as e:
+        logger.error("Cannot use daemon socket directory: %s", e)
+        sys.exit(1)
+
+    if os.path.exists(_DAEMON_SOCKET):
+        os.unlink(_DAEMON_SOCKET)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(_DAEMON_SOCKET)
+    os.chmod(_DAEMON_SOCKET, 0o600)
+    server.listen(5)
+    logger.info("Daemon listening on %s", _DAEMON_SOCKET)
+
+    root = logging.getLogger()
+    try:
+        while True:
+            client, _ = server.accept()
+            with client:
+                log_handler = _ClientLogHandler(client)
+                root.addHandler(log_handler)
+                try:
+                    request = _recv_frame(client)
+                    if request is None:
+                        continue
+                    with _client_context(request):
+                        args = parse_args(request.get("argv", []))
+                        stats = _run_simulation(args, logger)
+                    _send_frame(client, {"stats": stats.to_dict() if stats else None})
+                except SystemExit:
+                    _send_frame(client, {"error": "Invalid arguments"})
+                except Exception as e:
+                    logger.error("Daemon request failed: %s", e)
+                    _send_frame(client, {"error": str(e)})
+                finally:
+                    root.removeHandler(log_handler)
     except KeyboardInterrupt:
-        logger.info("Interrupted by user")
-        agent.stop()
+        logger.info("Daemon stopped")
+    finally:
+        server.close()
+        if os.path.exists(_DAEMON_SOCKET):
+            os.unlink(_DAEMON_SOCKET)
+
+
+def _run_in_daemon(argv: list, logger: logging.Logger) -> Optional[dict]:
+    """
+    Forward a run to a resident daemon started by this user.
+
+    The daemon runs it in this process's working directory with this
+    process's SEDT_/ANTHROPIC_ variables; its log lines are written to
+    this process's stderr as they arrive.
+
+    Returns:
+        The daemon's reply, or None if no daemon of this user is reachable
+    """
+    import socket
+
+    try:
+        if os.stat(_DAEMON_SOCKET).st_uid != os.getuid():
+            logger.warning("Ignoring daemon socket %s owned by another user", _DAEMON_SOCKET)
+            return None
+    except OSError:
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(_DAEMON_SOCKET)
+    except OSError:
+        sock.close()
+        return None
+
+    out = getattr(sys.stderr, "buffer", None)
+    with sock:
+        _send_frame(sock, {
+            "argv": argv,
+            "cwd": os.getcwd(),
+            "env": {k: v for k, v in _ENV.items() if k.startswith(_FORWARDED_ENV_PREFIXES)},
+        })
+        while True:
+            reply = _recv_frame(sock)
+            if reply is None:
+                return {"error": "Daemon closed the connection"}
+            if "log" not in reply:
+                return reply
+            if out is None:
+                sys.stderr.write(reply["log"] + "\n")
+            else:
+                out.write(reply["log"].encode("utf-8", "backslashreplace") + b"\n")
+                out.flush()
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+
+    setup_logging(args.verbose)
+    logger = logging.getLogger("sedt")
+
+    if args.serve:
+        _serve(logger)
+        return
+
+    if args.client or _ENV.get("SEDT_DAEMON") == "1":
+        reply = _run_in_daemon([a for a in sys.argv[1:] if a != "--client"], logger)
+        if reply is not None:
+            if reply.get("error"):
+                logger.error(reply["error"])
+                sys.exit(1)
+            logger.info("Simulation complete (daemon): %s", reply.get("stats"))
+            return
+        logger.info("No daemon listening on %s, running here", _DAEMON_SOCKET)
+
+    try:
+        _run_simulation(args, logger)
+    except FileNotFoundError as e:
+        logger.error(str(e))
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -8,18 +8,281 @@ that generate authentic Sysmon/Windows Event logs.
 Usage:
     python action_executor.py --action '{"action_type": "open_application", "target": "notepad", "parameters": {}}'
 
+A JSON list of payloads may be sent instead of a single object; the
+actions run in order and a list of results is returned. With --action -
+the payload is read from stdin, which avoids shell quoting altogether.
+
+With --stdio-loop the script stays running and executes one JSON payload
+per stdin line, writing one JSON result line per payload.
+
+PowerShell runs the way a user would start it. --lean-powershell opts in
+to -NoProfile -NonInteractive and a minimal child environment instead.
+
 The script outputs JSON to stdout for the RemoteExecutor to parse.
 """
 
 import argparse
+import functools
 import json
 import os
+import random
+import shutil
+import string
 import subprocess
 import sys
+import threading
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Callable, Dict, Any
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+# Optional faster JSON codec; orjson.JSONDecodeError subclasses json's
+try:
+    import orjson
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    def _loads(data):
+        # json.loads takes bytes but not memoryview
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+
+# Executable for each application name used by open_application
+_APP_PATHS = {
+    # System apps (always available)
+    "notepad": "notepad.exe",
+    "explorer": "explorer.exe",
+    "cmd": "cmd.exe",
+    "powershell": "powershell.exe",
+    "calculator": "calc.exe",
+    "paint": "mspaint.exe",
+    "snipping_tool": "SnippingTool.exe",
+    "wordpad": "notepad.exe",  # WordPad not on lean Win11
+    # Edge browser (default on Windows 11)
+    "edge": r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe",
+    "browser": r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe",
+    "chrome": r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe",  # Fallback to Edge
+    # Office apps (may not be installed - fallback to alternatives)
+    "word": "notepad.exe",  # Fallback to Notepad
+    "excel": "notepad.exe",  # Fallback to Notepad
+    "powerpoint": "notepad.exe",  # Fallback to Notepad
+    "outlook": r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe",  # Open webmail
+    "teams": r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe",  # Open web teams
+}
+
+# Benign download sources (public domain / safe sources)
+_SAFE_URLS = (
+    "https://www.gutenberg.org/files/1342/1342-0.txt",  # Pride and Prejudice
+    "https://www.gutenberg.org/files/84/84-0.txt",      # Frankenstein
+    "https://www.gutenberg.org/files/11/11-0.txt",      # Alice in Wonderland
+    "https://raw.githubusercontent.com/datasets/covid-19/main/data/countries-aggregated.csv",
+    "https://raw.githubusercontent.com/datasets/population/master/data/population.csv",
+)
+
+# Word lists for generated file names and content
+_FILE_PREFIXES = ("Report", "Notes", "Draft", "Meeting", "Summary", "Budget", "Plan")
+_FILE_EXTENSIONS = (".txt", ".docx", ".xlsx", ".pdf", ".csv")
+# edit_spreadsheet writes these three into CSV unquoted: no commas or quotes
+_BUDGET_CATEGORIES = ("Marketing", "Sales", "Operations", "IT", "HR", "R&D")
+_CONTACT_NAMES = ("John Smith", "Jane Doe", "Bob Wilson", "Alice Chen", "Mike Johnson")
+_DEPARTMENTS = ("Marketing", "Sales", "Engineering", "Support", "Finance")
+_DOC_TYPES = ("Meeting_Notes", "Report", "Memo", "Summary", "Draft")
+_PRESENTATION_TOPICS = ("Quarterly_Review", "Project_Update", "Strategy", "Training")
+
+# Private generator for generated names and content, and the byte
+# alphabet for filler text
+_RNG = random.Random()
+_ALPHABET = (string.ascii_letters + " ").encode("ascii")
+
+# Executables resolved once instead of a PATH search per call
+_POWERSHELL = (
+    shutil.which("powershell") or
+    r"C:\Windows\System32\WindowsPowerShell\v1.0\powershell.exe"
+)
+_POWERSHELL_CMD = (_POWERSHELL, "-Command")
+_CURL = shutil.which("curl") or "curl"
+
+# Opt-in lean mode (--lean-powershell): PowerShell skips the user's profile
+# and any prompts, and PowerShell/curl children get only the variables they
+# need to run, resolve the user profile and reach the network. Faster, but
+# hidden non-interactive shells with a stripped environment look less like
+# a real user and are flagged by common detection rules, so it is off by default.
+_LEAN_POWERSHELL_CMD = (_POWERSHELL, "-NoProfile", "-NonInteractive", "-Command")
+_ENV_KEYS = frozenset((
+    "SYSTEMROOT", "WINDIR", "SYSTEMDRIVE", "COMSPEC", "PATH", "PATHEXT",
+    "TEMP", "TMP", "USERNAME", "USERDOMAIN", "USERPROFILE", "HOMEDRIVE",
+    "HOMEPATH", "APPDATA", "LOCALAPPDATA", "PROGRAMDATA", "PROGRAMFILES",
+    "PROGRAMFILES(X86)", "PSMODULEPATH", "HTTP_PROXY", "HTTPS_PROXY", "NO_PROXY",
+))
+
+
+def _minimal_env() -> dict:
+    """The current environment reduced to _ENV_KEYS (lean mode only)."""
+    return {k: v for k, v in os.environ.items() if k.upper() in _ENV_KEYS}
+
+# Target classification flags returned by _classify_target
+_IS_URL = 1
+_IS_EXE = 2
+_HAS_PATH_SEP = 4
+_HTTP_PREFIX = "http"
+_EXE_SUFFIX = ".exe"
+
+
+def _classify_target(target: str) -> int:
+    """Classify an action target as a combination of the _IS_*/_HAS_* flags."""
+    lowered = target.lower()
+    flags = 0
+    if lowered.startswith(_HTTP_PREFIX):
+        flags |= _IS_URL
+    if lowered.endswith(_EXE_SUFFIX):
+        flags |= _IS_EXE
+    if "\\" in target or "/" in target:
+        flags |= _HAS_PATH_SEP
+    return flags
+
+
+@functools.lru_cache(maxsize=64)
+def _resolve_app(target: str) -> str:
+    """
+    Resolve an application name to the path open_application launches.
+
+    Bare names are searched on PATH (which covers App Execution Aliases),
+    then in System32 and %SystemRoot% itself (explorer.exe). Cached, so
+    the search only touches the filesystem once per name.
+    """
+    app_path = _APP_PATHS.get(target.lower(), target)
+    app_path = os.path.expandvars(app_path)
+
+    if _classify_target(app_path) & _HAS_PATH_SEP:
+        return app_path
+
+    found = shutil.which(app_path)
+    if found:
+        return found
+
+    system_root = os.environ.get("SystemRoot", "C:\\Windows")
+    for directory in (os.path.join(system_root, "System32"), system_root):
+        candidate = os.path.join(directory, app_path)
+        if os.path.exists(candidate):
+            return candidate
+
+    return app_path
+
+
+def _spawn_detached(path: str, args: tuple = ()):
+    """
+    Launch a program without waiting for it or connecting any pipes.
+
+    The child inherits no handles, so a long-lived GUI app cannot hold
+    the SSH session's stdout open after this script exits.
+    """
+    flags = 0
+    if sys.platform == "win32":
+        flags = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    subprocess.Popen(
+        [path, *args],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        close_fds=True,
+        creationflags=flags
+    )
+
+
+def _fast_copy(source: Path, dest: Path):
+    """
+    Copy a file with its metadata, like shutil.copy2.
+
+    On Windows this is one CopyFileW call, which copies in the kernel and
+    keeps timestamps and attributes.
+    """
+    if os.path.isdir(dest):
+        dest = os.path.join(dest, os.path.basename(source))
+    if sys.platform == "win32":
+        import ctypes
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        if not kernel32.CopyFileW(str(source), str(dest), False):
+            raise ctypes.WinError(ctypes.get_last_error())
+    else:
+        shutil.copyfile(source, dest)
+        shutil.copystat(source, dest)
+
+
+# (monotonic time, datetime, isoformat) of the last _now() clock read
+_now_cache = (0.0, None, "")
+
+
+def _now() -> Tuple[datetime, str]:
+    """
+    Current time and its ISO string.
+
+    Reused for half a second, so actions in the same batch share one
+    clock read.
+    """
+    global _now_cache
+    t = time.monotonic()
+    cached_at, dt, iso = _now_cache
+    if dt is None or t - cached_at >= 0.5:
+        dt = datetime.now()
+        iso = dt.isoformat()
+        _now_cache = (t, dt, iso)
+    return dt, iso
+
+
+@functools.lru_cache(maxsize=16)
+def _format_minute(minute: datetime, fmt: str) -> str:
+    return minute.strftime(fmt)
+
+
+def _stamp(fmt: str) -> str:
+    """strftime of the current minute (fmt must not use seconds or finer)."""
+    return _format_minute(_now()[0].replace(second=0, microsecond=0), fmt)
+
+
+# pyautogui is optional; its import is attempted once, on first use
+_pyautogui = None
+_pyautogui_checked = False
+
+
+def _get_pyautogui():
+    """Return the pyautogui module, or None if it is not installed."""
+    global _pyautogui, _pyautogui_checked
+    if not _pyautogui_checked:
+        try:
+            import pyautogui
+            _pyautogui = pyautogui
+        except ImportError:
+            pass
+        _pyautogui_checked = True
+    return _pyautogui
+
+
+def _random_match(base_path: Path, predicate: Callable[[str], bool]) -> Optional[Path]:
+    """
+    Pick a random file in base_path whose name satisfies predicate.
+
+    Single os.scandir pass with reservoir sampling, so no list of
+    candidates is built. Hidden files are skipped, as glob would.
+
+    Returns:
+        Path of the chosen file, or None if nothing matched
+    """
+    winner = None
+    seen = 0
+    with os.scandir(base_path) as entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith(".") or not predicate(name) or not entry.is_file():
+                continue
+            seen += 1
+            if _RNG.randrange(seen) == 0:
+                winner = entry.path
+    return Path(winner) if winner is not None else None
 
 
 class ActionExecutor:
@@ -32,31 +295,53 @@ class ActionExecutor:
     3. Generate authentic Sysmon events as a side effect
     """
 
-    def __init__(self):
-        """Initialize the action executor with available actions."""
-        self.actions: Dict[str, Callable] = {
-            "open_application": self.open_application,
-            "close_application": self.close_application,
-            "browse_web": self.browse_web,
-            "create_file": self.create_file,
-            "edit_file": self.edit_file,
-            "delete_file": self.delete_file,
-            "copy_file": self.copy_file,
-            "check_email": self.check_email,
-            "send_email": self.send_email,
-            "idle": self.idle,
-            "type_text": self.type_text,
-            "click": self.click,
-            "powershell": self.run_powershell,
-            "file_operation": self.file_operation,
-            # Document actions
-            "edit_spreadsheet": self.edit_spreadsheet,
-            "create_document": self.create_document,
-            "create_presentation": self.create_presentation,
-            # Download action
-            "download_file": self.download_file,
+    # action_type -> method name; bound once per instance in __init__
+    _ACTIONS: Dict[str, str] = {
+        "open_application": "open_application",
+        "close_application": "close_application",
+        "browse_web": "browse_web",
+        "create_file": "create_file",
+        "edit_file": "edit_file",
+        "delete_file": "delete_file",
+        "copy_file": "copy_file",
+        "check_email": "check_email",
+        "send_email": "send_email",
+        "idle": "idle",
+        "type_text": "type_text",
+        "click": "click",
+        "powershell": "run_powershell",
+        "file_operation": "file_operation",
+        # Document actions
+        "edit_spreadsheet": "edit_spreadsheet",
+        "create_document": "create_document",
+        "create_presentation": "create_presentation",
+        # Download action
+        "download_file": "download_file",
+    }
+
+    def __init__(self, max_idle_seconds: float = 5.0, lean_powershell: bool = False):
+        """
+        Initialize the action executor with available actions.
+
+        Args:
+            max_idle_seconds: Longest real wait for idle and browse_web
+            lean_powershell: Run PowerShell with -NoProfile -NonInteractive and
+                give PowerShell/curl a minimal environment (see _LEAN_POWERSHELL_CMD)
+        """
+        self.max_idle_seconds = max_idle_seconds
+        self.lean_powershell = lean_powershell
+        self._powershell_cmd = _LEAN_POWERSHELL_CMD if lean_powershell else _POWERSHELL_CMD
+        # Set on shutdown so waiting actions return immediately
+        self._shutdown = threading.Event()
+        self.actions: Dict[str, Callable[[str, dict], str]] = {
+            action_type: getattr(self, method_name)
+            for action_type, method_name in self._ACTIONS.items()
         }
 
+    def _child_env(self) -> Optional[dict]:
+        """Environment for PowerShell/curl children (None inherits ours)."""
+        return _minimal_env() if self.lean_powershell else None
+
     def execute(self, action_type: str, target: str, parameters: dict) -> dict:
         """
         Execute an action and return the result.
@@ -71,7 +356,8 @@ class ActionExecutor:
         """
         start_time = time.time()
 
-        if action_type not in self.actions:
+        method = self.actions.get(action_type)
+        if method is None:
             return {
                 "success": False,
                 "error": f"Unknown action type: {action_type}",
@@ -79,12 +365,13 @@ class ActionExecutor:
             }
 
         try:
-            result = self.actions[action_type](target, parameters)
+            result = method(target, parameters)
             duration_ms = int((time.time() - start_time) * 1000)
 
+            # Every action method returns a str
             return {
                 "success": True,
-                "output": result if isinstance(result, str) else str(result),
+                "output": result,
                 "error": "",
                 "duration_ms": duration_ms
             }
@@ -98,6 +385,25 @@ class ActionExecutor:
                 "duration_ms": duration_ms
             }
 
+    def execute_batch(self, payloads: list) -> list:
+        """
+        Execute several actions in order and return one result per action.
+
+        Args:
+            payloads: List of {"action_type", "target", "parameters"} dicts
+
+        Returns:
+            List of result dictionaries, in the same order as payloads
+        """
+        return [
+            self.execute(
+                action_type=payload.get("action_type", ""),
+                target=payload.get("target", ""),
+                parameters=payload.get("parameters", {})
+            )
+            for payload in payloads
+        ]
+
     # ==================== Application Actions ====================
 
     def open_application(self, target: str, parameters: dict) -> str:
@@ -106,40 +412,11 @@ class ActionExecutor:
 
         Generates: Sysmon Event ID 1 (Process Creation)
         """
-        app_paths = {
-            # System apps (always available)
-            "notepad": "notepad.exe",
-            "explorer": "explorer.exe",
-            "cmd": "cmd.exe",
-            "powershell": "powershell.exe",
-            "calculator": "calc.exe",
-            "paint": "mspaint.exe",
-            "snipping_tool": "SnippingTool.exe",
-            "wordpad": "notepad.exe",  # WordPad not on lean Win11
-            # Edge browser (default on Windows 11)
-            "edge": r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe",
-            "browser": r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe",
-            "chrome": r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe",  # Fallback to Edge
-            # Office apps (may not be installed - fallback to alternatives)
-            "word": "notepad.exe",  # Fallback to Notepad
-            "excel": "notepad.exe",  # Fallback to Notepad
-            "powerpoint": "notepad.exe",  # Fallback to Notepad
-            "outlook": r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe",  # Open webmail
-            "teams": r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe",  # Open web teams
-        }
-
-        app_path = app_paths.get(target.lower(), target)
-        app_path = os.path.expandvars(app_path)
-
-        # For system apps, use full path in System32
-        if not os.path.exists(app_path) and "\\" not in app_path:
-            system32_path = os.path.join(os.environ.get("SystemRoot", "C:\\Windows"), "System32", app_path)
-            if os.path.exists(system32_path):
-                app_path = system32_path
+        app_path = _resolve_app(target)
 
         # Launch directly - parent will be python.exe
         # This creates cleaner process tree than using cmd.exe shell
-        subprocess.Popen([app_path])
+        _spawn_detached(app_path)
 
         return f"Opened {target}"
 
@@ -149,11 +426,10 @@ class ActionExecutor:
 
         Generates: Sysmon Event ID 5 (Process Terminated)
         """
-        process_name = target if target.endswith(".exe") else f"{target}.exe"
+        process_name = target if _classify_target(target) & _IS_EXE else f"{target}{_EXE_SUFFIX}"
 
         subprocess.run(
-            f'taskkill /IM "{process_name}" /F',
-            shell=True,
+            ["taskkill", "/IM", process_name, "/F"],
             capture_output=True
         )
 
@@ -170,20 +446,15 @@ class ActionExecutor:
         - Sysmon Event ID 3 (Network Connection)
         - Sysmon Event ID 22 (DNS Query)
         """
-        url = target if target.startswith("http") else f"https://{target}"
+        url = target if _classify_target(target) & _IS_URL else f"https://{target}"
         duration = parameters.get("duration_seconds", 30)
 
-        # Open URL in default browser
-        subprocess.Popen(
-            f'start "" "{url}"',
-            shell=True,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL
-        )
+        # Open URL in default browser (ShellExecute, no cmd.exe hop)
+        os.startfile(url)
 
         # Simulate browsing time
         if duration > 0:
-            time.sleep(min(duration, 5))  # Cap at 5 seconds for responsiveness
+            self._shutdown.wait(min(duration, self.max_idle_seconds))
 
         return f"Browsed to {url}"
 
@@ -201,8 +472,7 @@ class ActionExecutor:
         # Ensure parent directory exists
         file_path.parent.mkdir(parents=True, exist_ok=True)
 
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(content)
+        file_path.write_text(content, encoding="utf-8")
 
         return f"Created {file_path}"
 
@@ -219,9 +489,11 @@ class ActionExecutor:
         if not file_path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
 
-        write_mode = "a" if mode == "append" else "w"
-        with open(file_path, write_mode, encoding="utf-8") as f:
-            f.write(content)
+        if mode == "append":
+            with file_path.open("a", encoding="utf-8") as f:
+                f.write(content)
+        else:
+            file_path.write_text(content, encoding="utf-8")
 
         return f"Edited {file_path}"
 
@@ -252,8 +524,7 @@ class ActionExecutor:
         source = Path(os.path.expandvars(target))
         dest = Path(os.path.expandvars(destination))
 
-        import shutil
-        shutil.copy2(source, dest)
+        _fast_copy(source, dest)
 
         return f"Copied {source} to {dest}"
 
@@ -263,41 +534,35 @@ class ActionExecutor:
 
         Generates: Sysmon Event ID 11, 23 (File Created/Deleted)
         """
-        import shutil
-        import random
-        import string
-
         # Use Downloads folder - Sysmon SwiftOnSecurity config monitors all files here
         base_path = Path(os.path.expandvars(parameters.get("path", "C:\\Users\\analyst\\Downloads")))
         base_path.mkdir(parents=True, exist_ok=True)
 
         # Generate realistic filename
-        prefixes = ["Report", "Notes", "Draft", "Meeting", "Summary", "Budget", "Plan"]
-        extensions = [".txt", ".docx", ".xlsx", ".pdf", ".csv"]
-        filename = f"{random.choice(prefixes)}_{random.randint(1, 999)}{random.choice(extensions)}"
+        filename = (
+            f"{_RNG.choice(_FILE_PREFIXES)}_{_RNG.randint(1, 999)}"
+            f"{_RNG.choice(_FILE_EXTENSIONS)}"
+        )
         file_path = base_path / filename
 
         if target == "create_file":
-            content = f"Created at {datetime.now().isoformat()}\n"
-            content += ''.join(random.choices(string.ascii_letters + ' ', k=random.randint(50, 200)))
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(content)
+            content = f"Created at {_now()[1]}\n".encode("ascii")
+            content += bytes(_RNG.choices(_ALPHABET, k=_RNG.randint(50, 200)))
+            file_path.write_bytes(content)
             return f"Created {file_path}"
 
         elif target == "copy_file":
             # Find an existing file to copy
-            existing = list(base_path.glob("*.*"))
-            if existing:
-                source = random.choice(existing)
+            source = _random_match(base_path, lambda name: "." in name)
+            if source is not None:
                 dest = base_path / f"Copy_of_{source.name}"
-                shutil.copy2(source, dest)
+                _fast_copy(source, dest)
                 return f"Copied {source} to {dest}"
             return "No files to copy"
 
         elif target == "move_file":
-            existing = list(base_path.glob("*.*"))
-            if existing:
-                source = random.choice(existing)
+            source = _random_match(base_path, lambda name: "." in name)
+            if source is not None:
                 archive = base_path / "Archive"
                 archive.mkdir(exist_ok=True)
                 dest = archive / source.name
@@ -307,9 +572,10 @@ class ActionExecutor:
 
         elif target == "delete_file":
             # Only delete temp/draft files
-            temp_files = list(base_path.glob("*.tmp")) + list(base_path.glob("Draft_*"))
-            if temp_files:
-                to_delete = random.choice(temp_files)
+            to_delete = _random_match(
+                base_path, lambda name: name.endswith(".tmp") or name.startswith("Draft_")
+            )
+            if to_delete is not None:
                 to_delete.unlink()
                 return f"Deleted {to_delete}"
             return "No temp files to delete"
@@ -326,29 +592,19 @@ class ActionExecutor:
         - Sysmon Event ID 11 (File Created)
         - Sysmon Event ID 22 (DNS Query)
         """
-        import random
-        import urllib.parse
-
-        # Default safe URLs for benign downloads (public domain / safe sources)
-        safe_urls = [
-            "https://www.gutenberg.org/files/1342/1342-0.txt",  # Pride and Prejudice
-            "https://www.gutenberg.org/files/84/84-0.txt",      # Frankenstein
-            "https://www.gutenberg.org/files/11/11-0.txt",      # Alice in Wonderland
-            "https://raw.githubusercontent.com/datasets/covid-19/main/data/countries-aggregated.csv",
-            "https://raw.githubusercontent.com/datasets/population/master/data/population.csv",
-        ]
-
         # Use provided URL or pick a safe default
-        if target and target.startswith("http"):
+        if _classify_target(target) & _IS_URL:
             url = target
         else:
-            url = random.choice(safe_urls)
+            url = _RNG.choice(_SAFE_URLS)
 
         # Determine filename from URL or generate one
         filename = parameters.get("filename")
         if not filename:
-            parsed = urllib.parse.urlparse(url)
-            filename = os.path.basename(parsed.path) or f"download_{random.randint(1000, 9999)}.txt"
+            # Last path segment, ignoring any query or fragment
+            rest = url.split("#", 1)[0].split("?", 1)[0].partition("://")[2]
+            filename = rest.rpartition("/")[2] if "/" in rest else ""
+            filename = filename or f"download_{_RNG.randint(1000, 9999)}.txt"
 
         # Download to Downloads folder
         download_path = Path(os.path.expandvars(r"C:\Users\analyst\Downloads"))
@@ -361,7 +617,8 @@ class ActionExecutor:
 
         try:
             result = subprocess.run(
-                ["powershell", "-Command", ps_command],
+                [*self._powershell_cmd, ps_command],
+                env=self._child_env(),
                 capture_output=True,
                 text=True,
                 timeout=60
@@ -370,7 +627,8 @@ class ActionExecutor:
             if result.returncode != 0:
                 # Try alternative method with curl if available
                 curl_result = subprocess.run(
-                    ["curl", "-L", "-o", str(file_path), url],
+                    [_CURL, "-L", "-o", str(file_path), url],
+                    env=self._child_env(),
                     capture_output=True,
                     text=True,
                     timeout=60
@@ -405,12 +663,7 @@ class ActionExecutor:
 
         # Use mailto: protocol
         mailto_url = f"mailto:{recipient}?subject={subject}&body={body}"
-        subprocess.Popen(
-            f'start "" "{mailto_url}"',
-            shell=True,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL
-        )
+        os.startfile(mailto_url)
 
         return f"Opened email compose to {recipient}"
 
@@ -422,18 +675,22 @@ class ActionExecutor:
 
         Requires pyautogui or similar library.
         """
-        try:
-            import pyautogui
+        pyautogui = _get_pyautogui()
+        if pyautogui is not None:
             pyautogui.typewrite(target, interval=0.05)
             return f"Typed {len(target)} characters"
-        except ImportError:
+        else:
             # Fallback: use PowerShell SendKeys
             escaped = target.replace("'", "''")
             ps_script = f"""
             Add-Type -AssemblyName System.Windows.Forms
             [System.Windows.Forms.SendKeys]::SendWait('{escaped}')
             """
-            subprocess.run(["powershell", "-Command", ps_script], capture_output=True)
+            subprocess.run(
+                [*self._powershell_cmd, ps_script],
+                env=self._child_env(),
+                capture_output=True
+            )
             return f"Typed {len(target)} characters (SendKeys)"
 
     def click(self, target: str, parameters: dict) -> str:
@@ -445,12 +702,11 @@ class ActionExecutor:
         x = parameters.get("x", 0)
         y = parameters.get("y", 0)
 
-        try:
-            import pyautogui
-            pyautogui.click(x, y)
-            return f"Clicked at ({x}, {y})"
-        except ImportError:
+        pyautogui = _get_pyautogui()
+        if pyautogui is None:
             return "pyautogui not available for click action"
+        pyautogui.click(x, y)
+        return f"Clicked at ({x}, {y})"
 
     # ==================== Utility Actions ====================
 
@@ -461,8 +717,9 @@ class ActionExecutor:
         Generates: No events (intentionally quiet period)
         """
         duration = parameters.get("duration_minutes", 1)
-        # Scale down for testing - 1 minute = 1 second
-        time.sleep(min(duration, 5))
+        seconds = parameters.get("duration_seconds", duration * 60)
+        # The Linux agent paces simulated time; only wait briefly here
+        self._shutdown.wait(min(seconds, self.max_idle_seconds))
         return f"Idle for {duration} minutes"
 
     def run_powershell(self, target: str, parameters: dict) -> str:
@@ -472,7 +729,8 @@ class ActionExecutor:
         Generates: Sysmon Event ID 1 (PowerShell process)
         """
         result = subprocess.run(
-            ["powershell", "-Command", target],
+            [*self._powershell_cmd, target],
+            env=self._child_env(),
             capture_output=True,
             text=True,
             timeout=30
@@ -491,54 +749,49 @@ class ActionExecutor:
 
         Generates: Sysmon Event ID 11 (File Created/Modified)
         """
-        import csv
-        import random
-
         # Default to Downloads folder for Sysmon visibility
         if not target or target == "spreadsheet":
             base_path = Path(os.path.expandvars(r"C:\Users\analyst\Downloads"))
             base_path.mkdir(parents=True, exist_ok=True)
-            filename = f"Budget_Report_{random.randint(100, 999)}.csv"
+            filename = f"Budget_Report_{_RNG.randint(100, 999)}.csv"
             file_path = base_path / filename
         else:
             file_path = Path(os.path.expandvars(target))
 
         # Generate realistic spreadsheet content
         content_type = parameters.get("content_type", "budget")
-        rows = parameters.get("rows", random.randint(10, 30))
+        rows = parameters.get("rows", _RNG.randint(10, 30))
 
-        data = []
+        # Cells are generated from fixed word lists with no commas or quotes,
+        # so rows are joined directly instead of going through csv.writer
+        randint = _RNG.randint
         if content_type == "budget":
-            headers = ["Category", "Q1", "Q2", "Q3", "Q4", "Total"]
-            categories = ["Marketing", "Sales", "Operations", "IT", "HR", "R&D"]
-            data.append(headers)
-            for cat in categories[:rows]:
-                q_values = [random.randint(5000, 50000) for _ in range(4)]
-                data.append([cat] + q_values + [sum(q_values)])
+            lines = [b"Category,Q1,Q2,Q3,Q4,Total"]
+            for cat in _BUDGET_CATEGORIES[:rows]:
+                q1, q2, q3, q4 = (randint(5000, 50000) for _ in range(4))
+                lines.append(f"{cat},{q1},{q2},{q3},{q4},{q1 + q2 + q3 + q4}".encode("ascii"))
         elif content_type == "contacts":
-            headers = ["Name", "Email", "Phone", "Department"]
-            data.append(headers)
-            names = ["John Smith", "Jane Doe", "Bob Wilson", "Alice Chen", "Mike Johnson"]
-            depts = ["Marketing", "Sales", "Engineering", "Support", "Finance"]
-            for i in range(min(rows, len(names))):
-                data.append([names[i], f"{names[i].lower().replace(' ', '.')}@company.com",
-                           f"555-{random.randint(1000, 9999)}", random.choice(depts)])
+            lines = [b"Name,Email,Phone,Department"]
+            for name in _CONTACT_NAMES[:rows]:
+                email = f"{name.lower().replace(' ', '.')}@company.com"
+                lines.append(
+                    f"{name},{email},555-{randint(1000, 9999)},{_RNG.choice(_DEPARTMENTS)}"
+                    .encode("ascii")
+                )
         else:
-            headers = ["Item", "Value", "Notes"]
-            data.append(headers)
+            lines = [b"Item,Value,Notes"]
             for i in range(rows):
-                data.append([f"Item_{i+1}", random.randint(1, 100), ""])
+                lines.append(f"Item_{i+1},{randint(1, 100)},".encode("ascii"))
 
-        # Write CSV file
+        # Write CSV file (CRLF line endings, as csv.writer produced)
         file_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(file_path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerows(data)
+        lines.append(b"")
+        file_path.write_bytes(b"\r\n".join(lines))
 
         # Open in notepad to simulate viewing/editing
-        subprocess.Popen(["notepad.exe", str(file_path)])
+        _spawn_detached(_resolve_app("notepad"), (str(file_path),))
 
-        return f"Created spreadsheet {file_path} with {len(data)} rows"
+        return f"Created spreadsheet {file_path} with {len(lines) - 1} rows"
 
     def create_document(self, target: str, parameters: dict) -> str:
         """
@@ -546,14 +799,11 @@ class ActionExecutor:
 
         Generates: Sysmon Event ID 11 (File Created)
         """
-        import random
-
         # Default to Documents folder
         if not target or target == "document":
             base_path = Path(os.path.expandvars(r"C:\Users\analyst\Documents"))
             base_path.mkdir(parents=True, exist_ok=True)
-            doc_types = ["Meeting_Notes", "Report", "Memo", "Summary", "Draft"]
-            filename = f"{random.choice(doc_types)}_{datetime.now().strftime('%Y%m%d_%H%M')}.txt"
+            filename = f"{_RNG.choice(_DOC_TYPES)}_{_stamp('%Y%m%d_%H%M')}.txt"
             file_path = base_path / filename
         else:
             file_path = Path(os.path.expandvars(target))
@@ -564,7 +814,7 @@ class ActionExecutor:
 
         if not content:
             if doc_type == "meeting_notes":
-                content = f"""Meeting Notes - {datetime.now().strftime('%B %d, %Y')}
+                content = f"""Meeting Notes - {_stamp('%B %d, %Y')}
 
 Attendees: Marketing Team
 
@@ -582,7 +832,7 @@ Next Meeting: TBD
 """
             elif doc_type == "report":
                 content = f"""Weekly Status Report
-Date: {datetime.now().strftime('%Y-%m-%d')}
+Date: {_stamp('%Y-%m-%d')}
 Author: Analyst
 
 Summary:
@@ -599,15 +849,14 @@ Next Week:
 - Prepare monthly report
 """
             else:
-                content = f"Document created at {datetime.now().isoformat()}\n\n[Content placeholder]"
+                content = f"Document created at {_now()[1]}\n\n[Content placeholder]"
 
         # Write document
         file_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(content)
+        file_path.write_text(content, encoding="utf-8")
 
         # Open in notepad
-        subprocess.Popen(["notepad.exe", str(file_path)])
+        _spawn_detached(_resolve_app("notepad"), (str(file_path),))
 
         return f"Created document {file_path}"
 
@@ -617,26 +866,23 @@ Next Week:
 
         Generates: Sysmon Event ID 11 (File Created)
         """
-        import random
-
         # Default to Documents folder
         if not target or target == "presentation":
             base_path = Path(os.path.expandvars(r"C:\Users\analyst\Documents"))
             base_path.mkdir(parents=True, exist_ok=True)
-            topics = ["Quarterly_Review", "Project_Update", "Strategy", "Training"]
-            filename = f"{random.choice(topics)}_Presentation_{datetime.now().strftime('%Y%m%d')}.txt"
+            filename = f"{_RNG.choice(_PRESENTATION_TOPICS)}_Presentation_{_stamp('%Y%m%d')}.txt"
             file_path = base_path / filename
         else:
             file_path = Path(os.path.expandvars(target))
 
         # Generate presentation outline
         topic = parameters.get("topic", "Quarterly Review")
-        slides = parameters.get("slides", random.randint(5, 10))
+        slides = parameters.get("slides", _RNG.randint(5, 10))
 
-        content = f"""PRESENTATION OUTLINE
+        parts = [f"""PRESENTATION OUTLINE
 ====================
 Title: {topic}
-Date: {datetime.now().strftime('%B %d, %Y')}
+Date: {_stamp('%B %d, %Y')}
 
 ---
 
@@ -655,87 +901,216 @@ SLIDE 3: Executive Summary
 - Key metrics
 - Recommendations
 
-"""
+"""]
+        append = parts.append
         for i in range(4, slides + 1):
-            content += f"""SLIDE {i}: Topic {i-3}
+            append(f"""SLIDE {i}: Topic {i-3}
 - Point 1
 - Point 2
 - Supporting data
 
-"""
+""")
 
-        content += """FINAL SLIDE: Questions?
+        append("""FINAL SLIDE: Questions?
 - Contact information
 - Next steps
-"""
+""")
+        content = "".join(parts)
 
         # Write presentation outline
         file_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(content)
+        file_path.write_text(content, encoding="utf-8")
 
         # Open in notepad
-        subprocess.Popen(["notepad.exe", str(file_path)])
+        _spawn_detached(_resolve_app("notepad"), (str(file_path),))
 
         return f"Created presentation outline {file_path}"
 
 
-def run_server(host: str = "0.0.0.0", port: int = 9999):
+# Receive buffer per server thread, reused across requests
+_recv_local = threading.local()
+
+
+def _recv_exact(sock, n: int) -> Optional[memoryview]:
+    """
+    Read exactly n bytes into this thread's receive buffer.
+
+    Returns:
+        A view of the bytes, valid until the next call on this thread,
+        or None if the peer closed first
+    """
+    buf = getattr(_recv_local, "buf", None)
+    if buf is None or len(buf) < n:
+        buf = _recv_local.buf = bytearray(max(n, 65536))
+    view = memoryview(buf)[:n]
+    pos = 0
+    while pos < n:
+        received = sock.recv_into(view[pos:], n - pos)
+        if not received:
+            return None
+        pos += received
+    return view
+
+
+def _recv_request(sock) -> Tuple[Optional[Union[bytes, memoryview]], bool]:
+    """
+    Read one request from a client.
+
+    Requests are a 4-byte big-endian length followed by the JSON payload.
+    Clients that predate framing send bare JSON, recognised by its first
+    byte; those are read until a complete JSON value has arrived.
+
+    Returns:
+        (payload or None if the client sent nothing, whether framed). A
+        framed payload is a view into the receive buffer, parsed in place.
+    """
+    head = sock.recv(4)
+    if not head:
+        return None, True
+
+    if head[:1] in (b"{", b"["):
+        decoder = json.JSONDecoder()
+        data = bytearray(head)
+        while True:
+            try:
+                decoder.raw_decode(data.decode("utf-8"))
+                return bytes(data), False
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                pass
+            chunk = sock.recv(4096)
+            if not chunk:
+                return bytes(data), False
+            data += chunk
+
+    if len(head) < 4:
+        rest = _recv_exact(sock, 4 - len(head))
+        if rest is None:
+            return None, True
+        head += rest
+    return _recv_exact(sock, int.from_bytes(head, "big")), True
+
+
+def _run_payload(executor: ActionExecutor, data) -> dict:
+    """Decode a JSON action (or list of actions) and run it, never raising."""
+    try:
+        payload = _loads(data)
+        if isinstance(payload, list):
+            return executor.execute_batch(payload)
+        return executor.execute(
+            action_type=payload.get("action_type", ""),
+            target=payload.get("target", ""),
+            parameters=payload.get("parameters", {})
+        )
+    except json.JSONDecodeError as e:
+        return {"success": False, "error": f"Invalid JSON: {e}"}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def _handle_client(client, executor: ActionExecutor):
+    """Read one request from a connected client, run it, and reply."""
+    try:
+        with client:
+            client.settimeout(30)  # Don't let a stalled client pin a worker
+
+            # Receive JSON command
+            data, framed = _recv_request(client)
+
+            if not data:
+                return
+
+            result = _run_payload(executor, data)
+
+            # Send response, framed the same way as the request
+            response = _dumps(result)
+            if framed:
+                response = len(response).to_bytes(4, "big") + response
+            client.sendall(response)
+
+    except Exception as e:
+        print(f"Client error: {e}", flush=True)
+
+
+def run_server(
+    host: str = "0.0.0.0",
+    port: int = 9999,
+    max_workers: int = 16,
+    max_idle_seconds: float = 5.0,
+    lean_powershell: bool = False
+):
     """
     Run ActionExecutor as a persistent socket server.
 
     This allows the executor to be started at login (via Startup folder)
     and have explorer.exe as its parent process, creating realistic
     process trees for spawned applications.
+
+    Requests and replies are length-prefixed JSON (see _recv_request).
+    Each client is handled on a worker thread, so an action that sleeps
+    (idle, browse_web) does not hold up other clients. SIGINT/SIGTERM stop
+    the server and cut short any waiting actions.
     """
+    import signal
     import socket
+    from concurrent.futures import ThreadPoolExecutor
 
-    executor = ActionExecutor()
+    executor = ActionExecutor(max_idle_seconds=max_idle_seconds, lean_powershell=lean_powershell)
+    shutdown = executor._shutdown
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+
+    if threading.current_thread() is threading.main_thread():
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: shutdown.set())
 
     server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
     server.bind((host, port))
-    server.listen(5)
+    server.listen(128)
+    # Wake up periodically to notice shutdown
+    server.settimeout(1.0)
 
     print(f"ActionExecutor server listening on {host}:{port}", flush=True)
 
-    while True:
-        try:
-            client, addr = server.accept()
-
-            # Receive JSON command
-            data = b""
-            while True:
-                chunk = client.recv(4096)
-                if not chunk:
-                    break
-                data += chunk
-                # Check for complete JSON (simple heuristic)
-                if data.strip().endswith(b"}"):
-                    break
+    try:
+        while not shutdown.is_set():
+            try:
+                client, addr = server.accept()
+                client.settimeout(None)
+                pool.submit(_handle_client, client, executor)
 
-            if not data:
-                client.close()
+            except socket.timeout:
                 continue
-
-            try:
-                payload = json.loads(data.decode('utf-8'))
-                result = executor.execute(
-                    action_type=payload.get("action_type", ""),
-                    target=payload.get("target", ""),
-                    parameters=payload.get("parameters", {})
-                )
-            except json.JSONDecodeError as e:
-                result = {"success": False, "error": f"Invalid JSON: {e}"}
             except Exception as e:
-                result = {"success": False, "error": str(e)}
+                print(f"Server error: {e}", flush=True)
+    finally:
+        server.close()
+        pool.shutdown(wait=True)
+        print("ActionExecutor server stopped", flush=True)
 
-            # Send response
-            client.sendall(json.dumps(result).encode('utf-8'))
-            client.close()
 
-        except Exception as e:
-            print(f"Server error: {e}", flush=True)
+def run_stdio_loop(max_idle_seconds: float = 5.0, lean_powershell: bool = False):
+    """
+    Execute JSON actions read line by line from stdin until it closes.
+
+    Each input line is one action payload (or a list of them); each reply
+    is written as one JSON line on stdout. This lets the Linux side keep a
+    single SSH session and interpreter open instead of one per action.
+
+    Args:
+        max_idle_seconds: Longest real wait for idle and browsing actions
+        lean_powershell: See ActionExecutor
+    """
+    executor = ActionExecutor(max_idle_seconds=max_idle_seconds, lean_powershell=lean_powershell)
+
+    # Replies own stdout; stray prints go to stderr so they can't break the protocol
+    out = sys.stdout.buffer
+    sys.stdout = sys.stderr
+
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
+        out.write(_dumps(_run_payload(executor, line)) + b"\n")
+        out.flush()
 
 
 def main():
@@ -743,39 +1118,72 @@ def main():
     parser = argparse.ArgumentParser(description="Execute Windows actions")
     parser.add_argument(
         "--action",
-        help='JSON action payload: {"action_type": "...", "target": "...", "parameters": {}}'
+        help='JSON action payload: {"action_type": "...", "target": "...", "parameters": {}}, '
+             'or a list of them to execute as a batch; "-" reads it from stdin'
     )
     parser.add_argument(
         "--server",
         action="store_true",
         help="Run in persistent server mode (listens on port 9999)"
     )
+    parser.add_argument(
+        "--stdio-loop",
+        action="store_true",
+        help="Read one JSON action per line from stdin and reply on stdout"
+    )
     parser.add_argument(
         "--port",
         type=int,
         default=9999,
         help="Port for server mode (default: 9999)"
     )
+    parser.add_argument(
+        "--max-idle-seconds",
+        type=float,
+        default=5.0,
+        help="Longest real wait for idle and browsing actions (default: 5)"
+    )
+    parser.add_argument(
+        "--lean-powershell",
+        action="store_true",
+        help="Run PowerShell with -NoProfile -NonInteractive and a minimal environment "
+             "(faster, but less like real user activity)"
+    )
 
     args = parser.parse_args()
 
     if args.server:
-        run_server(port=args.port)
+        run_server(
+            port=args.port,
+            max_idle_seconds=args.max_idle_seconds,
+            lean_powershell=args.lean_powershell
+        )
+    elif args.stdio_loop:
+        run_stdio_loop(
+            max_idle_seconds=args.max_idle_seconds,
+            lean_powershell=args.lean_powershell
+        )
     elif args.action:
         try:
-            payload = json.loads(args.action)
+            payload = _loads(sys.stdin.buffer.read() if args.action == "-" else args.action)
         except json.JSONDecodeError as e:
-            print(json.dumps({"success": False, "error": f"Invalid JSON: {e}"}))
+            print(_dumps({"success": False, "error": f"Invalid JSON: {e}"}).decode("utf-8"))
             sys.exit(1)
 
-        executor = ActionExecutor()
-        result = executor.execute(
-            action_type=payload.get("action_type", ""),
-            target=payload.get("target", ""),
-            parameters=payload.get("parameters", {})
+        executor = ActionExecutor(
+            max_idle_seconds=args.max_idle_seconds,
+            lean_powershell=args.lean_powershell
         )
+        if isinstance(payload, list):
+            result = executor.execute_batch(payload)
+        else:
+            result = executor.execute(
+                action_type=payload.get("action_type", ""),
+                target=payload.get("target", ""),
+                parameters=payload.get("parameters", {})
+            )
 
-        print(json.dumps(result))
+        print(_dumps(result).decode("utf-8"))
     else:
         parser.print_help()
 
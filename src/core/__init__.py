@@ -1,8 +1,6 @@
 """Core components: DecisionEngine, DetectionSimAgent, RemoteExecutor"""
 
-from .decision_engine import DecisionEngine, Decision, WorkerState
-from .agent import DetectionSimAgent, SimulationConfig, SimulationStats
-from .remote_executor import RemoteExecutor, ExecutionResult
+import importlib
 
 __all__ = [
     "DecisionEngine",
@@ -14,3 +12,28 @@ __all__ = [
     "RemoteExecutor",
     "ExecutionResult",
 ]
+
+# Exported name -> defining submodule; imported on first access (PEP 562)
+_LAZY = {
+    "DecisionEngine": "decision_engine",
+    "Decision": "decision_engine",
+    "WorkerState": "decision_engine",
+    "DetectionSimAgent": "agent",
+    "SimulationConfig": "agent",
+    "SimulationStats": "agent",
+    "RemoteExecutor": "remote_executor",
+    "ExecutionResult": "remote_executor",
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return __all__
@@ -10,9 +10,13 @@ Architecture:
 """
 
 import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
 from typing import Optional
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 
 from .decision_engine import DecisionEngine, WorkerState, Decision
 from .remote_executor import RemoteExecutor, ExecutionResult
@@ -25,14 +29,25 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+def _format_clock(t: datetime) -> str:
+    """HH:MM for log lines, without strftime's format parsing."""
+    return f"{t.hour:02d}:{t.minute:02d}"
+
+
+@dataclass(frozen=True, slots=True)
 class SimulationConfig:
-    """Configuration for the simulation."""
+    """Configuration for the simulation (immutable; use dataclasses.replace)."""
     profile_path: str
     time_compression: float = 1.0  # 1.0 = real-time, 60.0 = 1 min = 1 hour
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
     dry_run: bool = False  # If True, don't execute real actions
+    profile_data: Optional[dict] = None  # Pre-parsed profile (skips reading profile_path)
+    batch_size: int = 1  # Actions sent per round-trip; 1 disables batching
+    batch_window_seconds: float = 5.0  # Max real seconds an action waits in a batch
+    sample_batch: int = 1  # Activity samples drawn at once by the decision engine
+    event_driven: bool = False  # Jump over off-hours and scheduled idle spans without waiting
+    stop_event: Optional[threading.Event] = None  # Set to stop the run after the current step
 
     # Remote Windows VM configuration
     windows_host: str = "192.168.1.100"  # Example IP - change for your environment  # NOSEC
@@ -42,16 +57,26 @@ class SimulationConfig:
     windows_ssh_key: Optional[str] = None
     windows_python_path: str = r"C:\Users\analyst\AppData\Local\Programs\Python\Python311\python.exe"
     windows_executor_path: str = r"C:\sedt\action_executor.py"
+    ssh_backend: str = "subprocess"  # See remote_executor.SSH_BACKENDS
+    ssh_pool_size: int = 1  # Persistent connections for pooled backends
+    max_ssh_sessions: int = 10  # SSH commands in flight at once
 
     def __post_init__(self):
+        # Frozen, so defaults are filled in through object.__setattr__
         if self.start_time is None:
             # Default: today at 9 AM
             today = datetime.now().date()
-            self.start_time = datetime.combine(today, datetime.strptime("09:00", "%H:%M").time())
+            object.__setattr__(
+                self, "start_time",
+                datetime.combine(today, datetime.strptime("09:00", "%H:%M").time())
+            )
         if self.end_time is None:
             # Default: today at 5 PM
             today = datetime.now().date()
-            self.end_time = datetime.combine(today, datetime.strptime("17:00", "%H:%M").time())
+            object.__setattr__(
+                self, "end_time",
+                datetime.combine(today, datetime.strptime("17:00", "%H:%M").time())
+            )
 
 
 @dataclass
@@ -64,16 +89,28 @@ class SimulationStats:
     real_duration: timedelta = field(default_factory=timedelta)
     action_counts: dict = field(default_factory=dict)
 
+    def set_durations(self, simulated: timedelta, real: timedelta):
+        """
+        Record the simulated and real run durations.
+
+        Args:
+            simulated: Simulated time covered
+            real: Wall-clock time taken
+        """
+        self.simulated_duration = simulated
+        self.real_duration = real
+
     def to_dict(self) -> dict:
+        simulated_seconds = self.simulated_duration.total_seconds()
+        real_seconds = self.real_duration.total_seconds()
         return {
             "total_decisions": self.total_decisions,
             "actions_executed": self.actions_executed,
             "actions_failed": self.actions_failed,
-            "simulated_duration_minutes": self.simulated_duration.total_seconds() / 60,
-            "real_duration_seconds": self.real_duration.total_seconds(),
+            "simulated_duration_minutes": simulated_seconds / 60,
+            "real_duration_seconds": real_seconds,
             "compression_achieved": (
-                self.simulated_duration.total_seconds() / self.real_duration.total_seconds()
-                if self.real_duration.total_seconds() > 0 else 0
+                simulated_seconds / real_seconds if real_seconds > 0 else 0
             ),
             "action_breakdown": self.action_counts
         }
@@ -98,20 +135,43 @@ class DetectionSimAgent:
             config: Simulation configuration
         """
         self.config = config
-        self.decision_engine = DecisionEngine(config.profile_path)
+        self.decision_engine = DecisionEngine(
+            config.profile_path,
+            profile=config.profile_data,
+            sample_batch=config.sample_batch
+        )
         self.remote_executor: Optional[RemoteExecutor] = None
 
         self.simulated_time = config.start_time
+        self._clock = _format_clock(self.simulated_time)  # Refreshed as time moves
         self.state = WorkerState(current_time=self.simulated_time)
         self.stats = SimulationStats()
         self.running = False
+        self._stop_event = config.stop_event or threading.Event()
+
+        # Can fall back to True if the Windows VM is unreachable
+        self.dry_run = config.dry_run
+
+        # Real seconds to wait per simulated minute
+        self._real_seconds_per_minute = 60.0 / config.time_compression
+
+        # Decisions waiting to be sent as one batch (batch_size > 1)
+        self._pending: deque = deque()
+        self._pending_since = 0.0
+
+        # Remote action still running: (decision, future)
+        self._in_flight: Optional[tuple] = None
+
+        # Next LLM decision, computed while waiting out the current action
+        self._prefetcher: Optional[ThreadPoolExecutor] = None
+        self._prefetch: Optional[tuple] = None  # (simulated time, future, timeout)
 
         logger.info(f"Agent initialized for profile: {config.profile_path}")
         logger.info(f"Time compression: {config.time_compression}x")
         logger.info(f"Simulating: {config.start_time} to {config.end_time}")
 
         # Initialize remote executor if not dry run
-        if not config.dry_run:
+        if not self.dry_run:
             self._init_remote_executor()
 
     def _init_remote_executor(self):
@@ -124,13 +184,16 @@ class DetectionSimAgent:
                 ssh_port=self.config.windows_ssh_port,
                 ssh_key_path=self.config.windows_ssh_key,
                 python_path=self.config.windows_python_path,
-                executor_path=self.config.windows_executor_path
+                executor_path=self.config.windows_executor_path,
+                ssh_backend=self.config.ssh_backend,
+                pool_size=self.config.ssh_pool_size,
+                max_sessions=self.config.max_ssh_sessions
             )
             logger.info(f"Connected to Windows VM at {self.config.windows_host}")
         except ConnectionError as e:
             logger.warning(f"Could not connect to Windows VM: {e}")
             logger.warning("Running in dry-run mode")
-            self.config.dry_run = True
+            self.dry_run = True
 
     def run(self) -> SimulationStats:
         """
@@ -139,37 +202,51 @@ class DetectionSimAgent:
         Returns:
             SimulationStats with run statistics
         """
-        import time
-
         self.running = True
         real_start = datetime.now()
 
         logger.info("Starting simulation...")
 
+        # Loop-invariant lookups bound once
+        end_time = self.config.end_time
+        batched = self.config.batch_size > 1
+        event_driven = self.config.event_driven
+        real_seconds_per_minute = self._real_seconds_per_minute
+        stop_event = self._stop_event
+
+        if event_driven:
+            self._skip_to_work_start()
+
+        # LLM latency is hidden behind the real wait; heuristics need no help
+        if self.decision_engine.use_llm:
+            self._prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+
         try:
-            while self.running and self.simulated_time < self.config.end_time:
+            while (self.running and not stop_event.is_set()
+                   and self.simulated_time < end_time):
                 # Get next decision
-                decision = self.decision_engine.decide_next_action(self.state)
-                self.decision_engine.action_history.append(decision)
+                decision = self._next_decision()
+                self.decision_engine.record_decision(decision)
+                self.decision_engine.apply_decision(self.state, decision)
                 self.stats.total_decisions += 1
 
-                # Log decision
-                logger.info(
-                    f"[{self.simulated_time.strftime('%H:%M')}] "
-                    f"{decision.action_type}: {decision.target} "
-                    f"({decision.reasoning})"
-                )
+                # Log decision (formatted only if INFO is enabled)
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info(
+                        "[%s] %s: %s (%s)",
+                        self._clock,
+                        decision.action_type, decision.target, decision.reasoning
+                    )
 
                 # Execute action
                 if decision.action_type == "end_day":
                     logger.info("End of workday reached")
                     break
 
-                success = self._execute_action(decision)
-                if success:
-                    self.stats.actions_executed += 1
+                if batched:
+                    self._queue_action(decision)
                 else:
-                    self.stats.actions_failed += 1
+                    self._submit_action(decision)
 
                 # Track action types
                 action_type = decision.action_type
@@ -181,66 +258,203 @@ class DetectionSimAgent:
                 action_duration = decision.parameters.get("duration_minutes", 5)
                 self._advance_time(minutes=action_duration)
 
+                # Scheduled idle spans have nothing to send; skip the wait
+                if event_driven and decision.action_type == "idle":
+                    continue
+
                 # Apply time compression for real wait
-                real_wait = action_duration * 60 / self.config.time_compression
+                real_wait = action_duration * real_seconds_per_minute
                 if real_wait > 0.1:  # Minimum wait to prevent CPU spinning
-                    time.sleep(real_wait)
+                    if self._prefetcher is not None:
+                        self._start_prefetch(real_wait)
+                    stop_event.wait(real_wait)
 
         except KeyboardInterrupt:
             logger.info("Simulation interrupted by user")
         finally:
+            if self._stop_event.is_set():
+                logger.info("Simulation stopped")
+            self._collect_action()
+            self._flush_actions()
+            if self._prefetcher is not None:
+                self._prefetcher.shutdown(wait=False, cancel_futures=True)
+                self._prefetcher = None
+                self._prefetch = None
+            if self.remote_executor is not None:
+                self.remote_executor.close()
+                self.remote_executor = None
             self.running = False
             real_end = datetime.now()
-            self.stats.real_duration = real_end - real_start
-            self.stats.simulated_duration = self.simulated_time - self.config.start_time
+            self.stats.set_durations(
+                simulated=self.simulated_time - self.config.start_time,
+                real=real_end - real_start
+            )
 
         logger.info(f"Simulation complete: {self.stats.to_dict()}")
         return self.stats
 
-    def _execute_action(self, decision: Decision) -> bool:
+    def _next_decision(self) -> Decision:
+        """Take the prefetched decision for the current state, or decide now."""
+        prefetch, self._prefetch = self._prefetch, None
+        if prefetch is not None:
+            prefetched_time, future, timeout = prefetch
+            decision = self._settle_prefetch(future, timeout)
+            if decision is not None and prefetched_time == self.simulated_time:
+                return decision
+        return self.decision_engine.decide_next_action(self.state)
+
+    def _settle_prefetch(self, future, timeout: float) -> Optional[Decision]:
         """
-        Execute a decision's action on the remote Windows VM.
+        Get a prefetched decision, leaving no engine call running.
 
-        Args:
-            decision: The decision to execute
+        The decision engine is not thread-safe, so a call still running
+        after the timeout is waited for (and its decision used) rather than
+        raced by a second one; a call that has not started is cancelled.
 
         Returns:
-            True if successful, False otherwise
+            The prefetched decision, or None if it was cancelled or failed
         """
-        if self.config.dry_run:
-            logger.debug(f"DRY RUN: Would execute {decision.action_type}")
-            return True
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            if future.cancel():
+                logger.debug("Prefetched decision did not start in time, deciding now")
+                return None
+            logger.debug("Prefetched decision is late, waiting for it")
+        except Exception as e:
+            logger.warning(f"Prefetched decision failed: {e}")
+            return None
+
+        try:
+            return future.result()
+        except Exception as e:
+            logger.warning(f"Prefetched decision failed: {e}")
+            return None
+
+    def _start_prefetch(self, real_wait: float):
+        """
+        Start deciding the next action in the background.
+
+        Args:
+            real_wait: Real seconds the loop is about to wait
+        """
+        state = replace(self.state, active_applications=list(self.state.active_applications))
+        future = self._prefetcher.submit(self.decision_engine.decide_next_action, state)
+        self._prefetch = (self.simulated_time, future, real_wait + 5)
+
+    def _submit_action(self, decision: Decision):
+        """
+        Start a decision's action on the remote Windows VM.
+
+        The action runs in the background while the agent waits and plans
+        the next step; its result is counted by _collect_action before the
+        next action is sent, or when the run ends.
+
+        Args:
+            decision: The decision to execute
+        """
+        self._collect_action()
+
+        if self.dry_run:
+            logger.debug("DRY RUN: Would execute %s", decision.action_type)
+            self._record_result(True)
+            return
 
         if self.remote_executor is None:
             # No executor configured, log only
-            logger.debug(f"No executor: {decision.action_type} -> {decision.target}")
-            return True
+            logger.debug("No executor: %s -> %s", decision.action_type, decision.target)
+            self._record_result(True)
+            return
+
+        future = self.remote_executor.execute_async(
+            action_type=decision.action_type,
+            target=decision.target,
+            parameters=decision.parameters
+        )
+        self._in_flight = (decision, future)
+
+    def _collect_action(self):
+        """Wait for the action in flight, if any, and count its result."""
+        if self._in_flight is None:
+            return
+        decision, future = self._in_flight
+        self._in_flight = None
 
         try:
-            result: ExecutionResult = self.remote_executor.execute(
-                action_type=decision.action_type,
-                target=decision.target,
-                parameters=decision.parameters
-            )
+            result: ExecutionResult = future.result()
 
             if result.success:
-                logger.debug(f"Action succeeded: {result.output}")
+                logger.debug("Action succeeded: %s", result.output)
             else:
-                logger.warning(f"Action failed: {result.error}")
+                logger.warning("Action failed: %s", result.error)
 
-            return result.success
+            self._record_result(result.success)
 
         except Exception as e:
-            logger.error(f"Action failed: {decision.action_type} - {e}")
-            return False
+            logger.error("Action failed: %s - %s", decision.action_type, e)
+            self._record_result(False)
+
+    def _record_result(self, success: bool):
+        """Count an executed action as succeeded or failed."""
+        if success:
+            self.stats.actions_executed += 1
+        else:
+            self.stats.actions_failed += 1
+
+    def _queue_action(self, decision: Decision):
+        """
+        Add a decision to the pending batch and flush it once it is full
+        or the oldest queued action has waited batch_window_seconds.
+        """
+        if not self._pending:
+            self._pending_since = time.monotonic()
+        self._pending.append(decision)
+
+        if (len(self._pending) >= self.config.batch_size or
+                time.monotonic() - self._pending_since >= self.config.batch_window_seconds):
+            self._flush_actions()
+
+    def _flush_actions(self):
+        """Execute all pending decisions in a single round-trip."""
+        if not self._pending:
+            return
+
+        decisions = list(self._pending)
+        self._pending.clear()
+
+        if self.dry_run or self.remote_executor is None:
+            logger.debug("DRY RUN: Would execute batch of %d actions", len(decisions))
+            for _ in decisions:
+                self._record_result(True)
+            return
+
+        results = self.remote_executor.execute_many([
+            {"action_type": d.action_type, "target": d.target, "parameters": d.parameters}
+            for d in decisions
+        ])
+        for result in results:
+            if not result.success:
+                logger.warning("Action failed: %s - %s", result.action_type, result.error)
+            self._record_result(result.success)
+
+    def _skip_to_work_start(self):
+        """Jump simulated time forward to the start of work hours."""
+        work_start = self.decision_engine.next_work_start(self.simulated_time)
+        if work_start is not None and work_start < self.config.end_time:
+            self.simulated_time = work_start
+            self.state.current_time = work_start
+            self._clock = _format_clock(work_start)
+            logger.info(f"Skipping idle time until {self._clock}")
 
     def _advance_time(self, minutes: int):
         """Advance the simulated time."""
         self.simulated_time += timedelta(minutes=minutes)
         self.state.current_time = self.simulated_time
+        self._clock = _format_clock(self.simulated_time)
         self.state.minutes_since_last_break += minutes
 
     def stop(self):
         """Stop the simulation gracefully."""
         logger.info("Stopping simulation...")
         self.running = False
+        self._stop_event.set()
@@ -8,30 +8,157 @@ considering time of day, current activity, and behavioral patterns.
 import json
 import logging
 import os
-from datetime import datetime
+import random
+import re
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
+from itertools import accumulate, product
+from datetime import date, datetime, timedelta
 from pathlib import Path
 from typing import Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
 
 logger = logging.getLogger(__name__)
 
+# Parsed work schedules by their HH:MM values, shared by all engines
+_SCHEDULE_CACHE: dict[tuple, tuple] = {}
+
+# A reply wrapped in a markdown code block, with the JSON captured
+_FENCE_RE = re.compile(r'^\s*```(?:json)?\s*(.*?)\s*```\s*$', re.DOTALL)
+
+# LLM decision cache: situations remembered, decisions kept per situation,
+# and decisions needed before a situation is answered from the cache
+DECISION_CACHE_SIZE = 512
+DECISION_SAMPLES_PER_KEY = 8
+DECISION_MIN_SAMPLES = 3
+
+# Decisions planned per LLM call
+LLM_PLAN_SIZE = 8
+
+# LLM calls are retried with backoff on these HTTP statuses; after
+# LLM_MAX_FAILURES failed decisions in a row the API is skipped for
+# LLM_COOLDOWN_SECONDS
+LLM_ATTEMPTS = 3
+LLM_RETRY_STATUSES = (429, 502, 503, 529)
+LLM_MAX_FAILURES = 3
+LLM_COOLDOWN_SECONDS = 60.0
+
+# Decisions kept in DecisionEngine.action_history, and the recent window
+# used for weighting and prompts
+HISTORY_SIZE = 1024
+RECENT_WINDOW = 5
+
+# How long after the start of work hours a run's first action opens Outlook
+START_OF_DAY_WINDOW = timedelta(minutes=15)
+
+
+# Start hour of each time-of-day weighting bucket
+_HOUR_BUCKET_STARTS = (0, 10, 12, 14, 16)
+
+
+def _activity_weights(
+    hour: int,
+    emails_recent: bool,
+    browse_recent: bool,
+    break_due: bool
+) -> dict:
+    """Weight each activity type for one time-of-day bucket and recent state."""
+    # Balanced weights favoring document work (typical marketing coordinator)
+    weights = {
+        "email": 18,
+        "browse": 10,  # Reduced - browsing should be occasional, not dominant
+        "spreadsheet": 15,  # Budget reports, data analysis
+        "document": 18,  # Meeting notes, memos, reports
+        "presentation": 10,  # Presentation drafts
+        "application": 8,
+        "file_operation": 9,
+        "download": 5,  # Occasional file downloads (templates, resources)
+        "idle": 10,
+    }
+
+    # Adjust weights based on time of day
+    if hour < 10:  # Early morning: email and planning
+        weights["email"] += 15
+        weights["spreadsheet"] += 5
+    elif 10 <= hour < 12:  # Mid-morning: productive document work
+        weights["document"] += 12
+        weights["spreadsheet"] += 8
+        weights["presentation"] += 5
+    elif 12 <= hour < 14:  # Around lunch: lighter tasks
+        weights["browse"] += 5
+        weights["idle"] += 5
+    elif 14 <= hour < 16:  # Afternoon: continued work with some breaks
+        weights["document"] += 8
+        weights["presentation"] += 5
+        weights["idle"] += 3
+    elif hour >= 16:  # Late afternoon: wrapping up, file organization
+        weights["email"] += 10
+        weights["file_operation"] += 8
+
+    # Reduce email weight if checked recently
+    if emails_recent:
+        weights["email"] = max(5, weights["email"] - 15)
+
+    # Reduce browse weight if browsed recently (prevent browse loops)
+    if browse_recent:
+        weights["browse"] = max(3, weights["browse"] - 10)
+
+    # Increase idle weight if working continuously
+    if break_due:
+        weights["idle"] += 15
+
+    return weights
+
+
+def _build_weight_tables() -> dict:
+    """
+    Precompute (activities, cumulative weights) for every weighting key.
+
+    Keys are (hour bucket index, emails recent, browse recent, break due),
+    as produced by DecisionEngine._weight_key.
+    """
+    tables = {}
+    for bucket, start in enumerate(_HOUR_BUCKET_STARTS):
+        for flags in product((False, True), repeat=3):
+            weights = _activity_weights(start, *flags)
+            tables[(bucket, *flags)] = (tuple(weights), tuple(accumulate(weights.values())))
+    return tables
+
 
-@dataclass
+_WEIGHT_TABLES = _build_weight_tables()
+
+# Hour of day (0-23) -> index of its weighting bucket
+_HOUR_BUCKETS = tuple(bisect_right(_HOUR_BUCKET_STARTS, hour) - 1 for hour in range(24))
+
+
+@dataclass(slots=True)
 class WorkerState:
     """Current state of the simulated worker."""
     current_time: datetime
     current_activity: Optional[str] = None
-    active_applications: list = None
+    active_applications: list = field(default_factory=list)
     minutes_since_last_break: int = 0
     emails_pending: int = 0
     focus_level: float = 1.0  # 0.0 to 1.0
 
-    def __post_init__(self):
-        if self.active_applications is None:
-            self.active_applications = []
 
+@dataclass(frozen=True, slots=True)
+class RecentStats:
+    """Summary of the recent-decision window, computed in one pass."""
+    emails: int         # Outlook opened or checked
+    browse: int         # browse_web decisions
+    browse_streak: int  # browse_web decisions in a row, ending with the latest
+    last_types: tuple   # Action types of the last three decisions
 
-@dataclass
+
+@dataclass(slots=True)
 class Decision:
     """A decision about what action to take next."""
     action_type: str  # e.g., "open_application", "browse_web", "write_document"
@@ -48,6 +175,58 @@ class Decision:
         }
 
 
+# Decisions whose content never varies, shared instead of rebuilt per call.
+# They must not be mutated; record_decision keeps copies in the history.
+_BREAK_DECISION = Decision(
+    action_type="idle",
+    target="break",
+    parameters={"duration_minutes": 15},
+    reasoning="Scheduled break time"
+)
+_LUNCH_DECISION = Decision(
+    action_type="idle",
+    target="lunch",
+    parameters={"duration_minutes": 60},
+    reasoning="Lunch break"
+)
+_END_DAY_DECISION = Decision(
+    action_type="end_day",
+    target="shutdown",
+    parameters={},
+    reasoning="Outside work hours"
+)
+_START_DAY_DECISION = Decision(
+    action_type="open_application",
+    target="outlook",
+    parameters={"duration_minutes": 5},
+    reasoning="Starting day with email check"
+)
+_OUTLOOK_OPEN_DECISION = Decision(
+    action_type="open_application",
+    target="outlook",
+    parameters={"duration_minutes": 5},
+    reasoning="Opening email client"
+)
+_EMAIL_CHECK_DECISION = Decision(
+    action_type="check_email",
+    target="outlook",
+    parameters={"action": "check_inbox", "duration_minutes": 3},
+    reasoning="Checking inbox for new messages"
+)
+
+# Scheduled event kind (see DecisionEngine._due_event) -> its decision
+_SCHEDULED_DECISIONS = {
+    "break": _BREAK_DECISION,
+    "lunch": _LUNCH_DECISION,
+    "end_day": _END_DAY_DECISION,
+}
+
+_SHARED_DECISION_IDS = frozenset(map(id, (
+    _BREAK_DECISION, _LUNCH_DECISION, _END_DAY_DECISION,
+    _START_DAY_DECISION, _OUTLOOK_OPEN_DECISION, _EMAIL_CHECK_DECISION,
+)))
+
+
 class DecisionEngine:
     """
     Determines what action the simulated worker should take next.
@@ -59,32 +238,87 @@ class DecisionEngine:
     - Behavioral patterns (focus, breaks, etc.)
     """
 
-    def __init__(self, profile_path: str, use_llm: bool = True):
+    def __init__(
+        self,
+        profile_path: str,
+        use_llm: bool = True,
+        profile: Optional[dict] = None,
+        sample_batch: int = 1
+    ):
         """
         Initialize with a worker profile.
 
         Args:
             profile_path: Path to the worker profile JSON file
             use_llm: Whether to use LLM API for decisions (default True)
+            profile: Already-parsed profile; skips reading profile_path
+            sample_batch: Activity samples drawn per choices() call
         """
-        self.profile = self._load_profile(profile_path)
-        self.action_history: list[Decision] = []
+        if profile is None:
+            self.profile = self._load_profile(profile_path)
+        else:
+            self.profile = self._validate_profile(profile)
+        self._compile_schedule()
+        self._compile_prompt()
+        # Append through record_decision so the recent window stays in step
+        self.action_history: deque[Decision] = deque(maxlen=HISTORY_SIZE)
+        self._recent: deque[Decision] = deque(maxlen=RECENT_WINDOW)
+        self._recent_lines: deque[str] = deque(maxlen=RECENT_WINDOW)  # For the LLM prompt
+        self._recent_summary: Optional[RecentStats] = None  # Cached by _recent_stats
         self.use_llm = use_llm
         self.llm_client = None
+        self._llm_failures = 0
+        self._llm_disabled_until = 0.0  # time.monotonic() deadline
+
+        # SEDT_SEED makes a run's activity choices reproducible
+        self._rng = random.Random(os.environ.get("SEDT_SEED"))
+        self._browse_sites = tuple(self.profile["activities"]["browser"]["typical_sites"])
+
+        # Activity name (as sampled from _WEIGHT_TABLES) -> decision factory
+        self._activity_factories = {
+            "email": self._decide_email,
+            "browse": self._decide_browse,
+            "spreadsheet": self._decide_spreadsheet,
+            "document": self._decide_document,
+            "presentation": self._decide_presentation,
+            "application": self._decide_application,
+            "file_operation": self._decide_file_operation,
+            "download": self._decide_download,
+            "idle": self._decide_idle,
+        }
+
+        # Pre-drawn activities, valid only while the weights are unchanged
+        self.sample_batch = max(1, sample_batch)
+        self._samples: list = []
+        self._samples_key: Optional[tuple] = None
+
+        # Past LLM decisions by abstracted situation (see _situation_key)
+        self._decision_cache: OrderedDict[tuple, list] = OrderedDict()
+
+        # Rest of the last LLM plan, valid while the state stays in _plan_bucket
+        self._planned_decisions: deque[Decision] = deque()
+        self._plan_bucket: Optional[tuple] = None
+
+        self._rule_decision = self._compile_rules()
 
         if use_llm:
             self._init_llm_client()
 
     def _load_profile(self, profile_path: str) -> dict:
-        """Load and validate worker profile from JSON."""
-        path = Path(profile_path)
-        if not path.exists():
-            raise FileNotFoundError(f"Profile not found: {profile_path}")
+        """
+        Load and validate worker profile from JSON.
 
-        with open(path, 'r') as f:
-            profile = json.load(f)
+        run_agent.py passes profiles it has already loaded (and caches), so
+        this is only used when no profile dict is given.
+        """
+        try:
+            data = Path(profile_path).read_bytes()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Profile not found: {profile_path}") from None
+        return self._validate_profile(_loads(data))
 
-        # Validate required fields
+    def _validate_profile(self, profile: dict) -> dict:
+        """Check that a parsed profile has the required fields."""
         required = ["name", "role", "work_schedule", "applications", "activities"]
         missing = [field for field in required if field not in profile]
         if missing:
@@ -92,6 +326,110 @@ class DecisionEngine:
 
         return profile
 
+    @staticmethod
+    def _parse_schedule(schedule: dict) -> tuple:
+        """
+        Parse a work schedule's HH:MM strings.
+
+        Returns:
+            (work_start, work_end, day_events) where day_events is the sorted
+            (time of day, event kind) tuple ending with the end of the workday
+        """
+        work_start = datetime.strptime(schedule["start_time"], "%H:%M").time()
+        work_end = datetime.strptime(schedule["end_time"], "%H:%M").time()
+
+        events = [
+            (datetime.strptime(b, "%H:%M").time(), "break")
+            for b in schedule.get("coffee_breaks", [])
+        ]
+        events.append((datetime.strptime(schedule["lunch_break"]["start"], "%H:%M").time(), "lunch"))
+        day_events = sorted(e for e in events if e[0] < work_end)
+        day_events.append((work_end, "end_day"))
+
+        return work_start, work_end, tuple(day_events)
+
+    def _compile_schedule(self):
+        """Set up the time checks from the profile's work schedule."""
+        # Parsed once per distinct schedule; the profile itself is not touched
+        schedule = self.profile["work_schedule"]
+        key = (
+            schedule["start_time"],
+            schedule["end_time"],
+            tuple(schedule.get("coffee_breaks", [])),
+            schedule["lunch_break"]["start"],
+        )
+        parsed = _SCHEDULE_CACHE.get(key)
+        if parsed is None:
+            parsed = _SCHEDULE_CACHE[key] = self._parse_schedule(schedule)
+        self._work_start, self._work_end, self._day_events = parsed
+
+        # The current day's events as datetimes; _schedule_index is the next
+        # one due. The schedule covers [_schedule_begin, _schedule_end).
+        self._schedule_begin = self._schedule_end = datetime.min
+        self._schedule_work_start = datetime.min
+        self._schedule_times: list[datetime] = []
+        self._schedule_index = 0
+
+    def _due_event(self, now: datetime) -> Optional[str]:
+        """
+        Consume the scheduled events reached by now.
+
+        Events already past when a day's schedule is first built are skipped,
+        except the end of the workday. Before work hours start the day
+        counts as ended.
+
+        Args:
+            now: Current simulated time
+
+        Returns:
+            Kind of the latest event reached ("break", "lunch", "end_day"),
+            or None if no new event is due
+        """
+        times = self._schedule_times
+        if not self._schedule_begin <= now < self._schedule_end:
+            day = now.date()
+            times = self._schedule_times = [
+                datetime.combine(day, t) for t, _ in self._day_events
+            ]
+            self._schedule_begin = datetime.combine(day, datetime.min.time())
+            self._schedule_end = self._schedule_begin + timedelta(days=1)
+            self._schedule_work_start = datetime.combine(day, self._work_start)
+            self._schedule_index = min(bisect_left(times, now), len(times) - 1)
+
+        if now < self._schedule_work_start:
+            return "end_day"
+
+        index = self._schedule_index
+        if now < times[index]:
+            return None
+        while index + 1 < len(times) and now >= times[index + 1]:
+            index += 1
+        self._schedule_index = index + 1 if index + 1 < len(times) else index
+        return self._day_events[index][1]
+
+    def _compile_rules(self):
+        """
+        Build the schedule and direct-rule checks into one closure.
+
+        The profile's constants and the bound methods are captured once, so
+        each call is a few local comparisons rather than attribute lookups.
+
+        Returns:
+            Function mapping a WorkerState to a rule-based Decision, or None
+            when the LLM or the weighted sampling should decide
+        """
+        due_event = self._due_event
+        scheduled = _SCHEDULED_DECISIONS
+        direct_decision = self._direct_decision
+
+        def rule_decision(state: WorkerState) -> Optional[Decision]:
+            event = due_event(state.current_time)
+            if event is not None:
+                return scheduled[event]
+            return direct_decision(state)
+
+        return rule_decision
+
     def _init_llm_client(self):
         """Initialize the Anthropic LLM client."""
         try:
@@ -101,7 +439,11 @@ class DecisionEngine:
                 logger.warning("ANTHROPIC_API_KEY not set, falling back to heuristics")
                 self.use_llm = False
                 return
-            self.llm_client = anthropic.Anthropic(api_key=api_key)
+            self.llm_client = anthropic.Anthropic(
+                api_key=api_key,
+                http_client=self._build_http_client(),
+                max_retries=0  # Retries are handled in _stream_plan
+            )
             logger.info("LLM API client initialized")
         except ImportError:
             logger.warning("anthropic package not installed, falling back to heuristics")
@@ -110,28 +452,24 @@ class DecisionEngine:
             logger.warning(f"Failed to initialize LLM client: {e}")
             self.use_llm = False
 
-    def _build_llm_prompt(self, state: WorkerState) -> str:
-        """Build the prompt for the LLM to decide the next action."""
-        # Recent action history (last 5)
-        recent_actions = [
-            f"- {d.action_type}: {d.target} ({d.reasoning})"
-            for d in self.action_history[-5:]
-        ]
-        history_str = "\n".join(recent_actions) if recent_actions else "None yet (just started)"
-
-        prompt = f"""You are simulating {self.profile['name']}, a {self.profile['role']} at work.
+    def _compile_prompt(self):
+        """Build the parts of the LLM prompt that depend only on the profile."""
+        profile = self.profile
+        role = profile['role']
+        primary_apps = ', '.join(profile['applications']['primary'])
+        sites = ', '.join(profile['activities']['browser']['typical_sites'][:5])
+        tasks = ', '.join(profile['activities']['documents']['common_tasks'])
 
-Current time: {state.current_time.strftime('%H:%M')} ({state.current_time.strftime('%A')})
-Minutes since last break: {state.minutes_since_last_break}
-Active applications: {', '.join(state.active_applications) if state.active_applications else 'None'}
-
-Recent actions:
-{history_str}
+        # Day name for the prompt, formatted once per simulated date
+        self._weekday_date: Optional[date] = None
+        self._weekday_name = ""
 
+        self._prompt_header = f"You are simulating {profile['name']}, a {role} at work.\n\n"
+        self._prompt_footer = f"""
 Worker's typical activities:
-- Primary apps: {', '.join(self.profile['applications']['primary'])}
-- Typical websites: {', '.join(self.profile['activities']['browser']['typical_sites'][:5])}
-- Document tasks: {', '.join(self.profile['activities']['documents']['common_tasks'])}
+- Primary apps: {primary_apps}
+- Typical websites: {sites}
+- Document tasks: {tasks}
 
 Available action types:
 - open_application: Open an app (target: outlook, edge, notepad, calculator)
@@ -146,61 +484,172 @@ Available action types:
 
 IMPORTANT: A marketing coordinator spends most time on documents, spreadsheets, and presentations - NOT constantly browsing. Only browse when researching specific topics. Vary activities naturally.
 
-Based on the time, recent activity, and what a {self.profile['role']} would realistically do next, decide the next action.
+Based on the time, recent activity, and what a {role} would realistically do next, plan the next {LLM_PLAN_SIZE} actions in order.
 
 Think about natural task flow - don't just randomly switch activities. Consider:
 - Did you just finish something that needs follow-up?
 - Is there a natural next step in your current work?
 - Have you been working continuously and need a break?
 
-Respond with ONLY a JSON object (no markdown, no explanation):
-{{"action_type": "...", "target": "...", "duration_minutes": N, "reasoning": "brief explanation"}}"""
+Respond with ONLY a JSON array of {LLM_PLAN_SIZE} objects (no markdown, no explanation):
+[{{"action_type": "...", "target": "...", "duration_minutes": N, "reasoning": "brief explanation"}}, ...]"""
 
-        return prompt
+    @staticmethod
+    def _build_http_client():
+        """
+        Build the long-lived HTTP client for the LLM API.
 
-    def _llm_decision(self, state: WorkerState) -> Optional[Decision]:
-        """Use LLM to decide the next action."""
-        if not self.llm_client:
+        Keeps TLS connections warm between decisions; uses HTTP/2 when the
+        h2 package is installed. Returns None (client default) without httpx.
+        """
+        try:
+            import httpx
+        except ImportError:
             return None
 
+        kwargs = {
+            "limits": httpx.Limits(
+                max_keepalive_connections=4,
+                max_connections=8,
+                keepalive_expiry=300
+            ),
+            "timeout": httpx.Timeout(connect=5, read=30, write=10, pool=5),
+        }
         try:
-            prompt = self._build_llm_prompt(state)
-
-            message = self.llm_client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=256,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            return httpx.Client(http2=True, **kwargs)
+        except ImportError:
+            logger.debug("h2 package not installed, using HTTP/1.1 for the LLM API")
+            return httpx.Client(**kwargs)
 
-            response_text = message.content[0].text.strip()
-
-            # Parse JSON response
-            # Handle potential markdown code blocks
-            if response_text.startswith("```"):
-                response_text = response_text.split("```")[1]
-                if response_text.startswith("json"):
-                    response_text = response_text[4:]
-                response_text = response_text.strip()
-
-            decision_data = json.loads(response_text)
-
-            return Decision(
-                action_type=decision_data.get("action_type", "idle"),
-                target=decision_data.get("target", "micro_break"),
-                parameters={
-                    "duration_minutes": decision_data.get("duration_minutes", 5)
-                },
-                reasoning=decision_data.get("reasoning", "LLM decision")
-            )
+    def _build_llm_prompt(self, state: WorkerState) -> str:
+        """Build the prompt for the LLM to decide the next action."""
+        # Recent action history (last 5), formatted as each was recorded
+        recent_lines = self._recent_lines
+        history_str = "\n".join(recent_lines) if recent_lines else "None yet (just started)"
+
+        now = state.current_time
+        if now.date() != self._weekday_date:
+            self._weekday_date = now.date()
+            self._weekday_name = now.strftime('%A')
+        active = ', '.join(state.active_applications) if state.active_applications else 'None'
+        return (
+            f"{self._prompt_header}"
+            f"Current time: {now.hour:02d}:{now.minute:02d} ({self._weekday_name})\n"
+            f"Minutes since last break: {state.minutes_since_last_break}\n"
+            f"Active applications: {active}\n\n"
+            f"Recent actions:\n{history_str}\n"
+            f"{self._prompt_footer}"
+        )
+
+    def _llm_decision_batch(self, state: WorkerState) -> list[Decision]:
+        """Use LLM to plan the next LLM_PLAN_SIZE actions in one call."""
+        if not self.llm_client:
+            return []
+        if time.monotonic() < self._llm_disabled_until:
+            return []
+
+        try:
+            plan = self._stream_plan(self._build_llm_prompt(state))
+            self._llm_failures = 0
+
+            if isinstance(plan, dict):
+                plan = [plan]
+
+            return [
+                Decision(
+                    action_type=decision_data.get("action_type", "idle"),
+                    target=decision_data.get("target", "micro_break"),
+                    parameters={
+                        "duration_minutes": decision_data.get("duration_minutes", 5)
+                    },
+                    reasoning=decision_data.get("reasoning", "LLM decision")
+                )
+                for decision_data in plan
+                if isinstance(decision_data, dict)
+            ]
 
         except json.JSONDecodeError as e:
             logger.warning(f"Failed to parse LLM response: {e}")
-            return None
+            self._llm_failed()
+            return []
         except Exception as e:
             logger.warning(f"LLM API error: {e}")
-            return None
+            self._llm_failed()
+            return []
+
+    def _stream_plan(self, prompt: str):
+        """
+        Request a plan, retrying transient API errors with jittered backoff.
+
+        Args:
+            prompt: Full LLM prompt
+
+        Returns:
+            The decoded JSON plan
+        """
+        for attempt in range(LLM_ATTEMPTS):
+            try:
+                # Stream the reply and stop reading once it holds complete JSON
+                with self.llm_client.messages.stream(
+                    model="claude-sonnet-4-20250514",
+                    max_tokens=1024,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ]
+                ) as stream:
+                    return self._read_plan(stream.text_stream)
+            except Exception as e:
+                status = getattr(e, "status_code", None)
+                if status not in LLM_RETRY_STATUSES or attempt + 1 == LLM_ATTEMPTS:
+                    raise
+                logger.debug(f"LLM API returned {status}, retrying")
+                time.sleep(0.2 * 2 ** attempt + self._rng.random() * 0.1)
+
+    def _llm_failed(self):
+        """Count a failed LLM decision, pausing the API after repeated failures."""
+        self._llm_failures += 1
+        if self._llm_failures >= LLM_MAX_FAILURES:
+            logger.warning(f"LLM API failing, using heuristics for {LLM_COOLDOWN_SECONDS:.0f}s")
+            self._llm_disabled_until = time.monotonic() + LLM_COOLDOWN_SECONDS
+            self._llm_failures = 0
+
+    @staticmethod
+    def _read_plan(chunks):
+        """
+        Parse streamed LLM text as soon as it forms a complete JSON value.
+
+        Text before the first bracket (such as a markdown fence) is dropped
+        and anything after the value is never read.
+
+        Args:
+            chunks: Iterable of reply text fragments
+
+        Returns:
+            The decoded JSON array or object
+        """
+        buf = bytearray()
+        started = False
+        for text in chunks:
+            scanned = len(buf)
+            buf += text.encode("utf-8")
+            if not started:
+                starts = [i for i in (buf.find(b"["), buf.find(b"{")) if i >= 0]
+                if not starts:
+                    continue
+                del buf[:min(starts)]
+                scanned = 0
+                started = True
+            # Only a closing bracket can complete the value
+            for i in range(scanned, len(buf)):
+                if buf[i] in b"]}":
+                    try:
+                        return _loads(buf[:i + 1])
+                    except json.JSONDecodeError:
+                        pass
+
+        # Stream ended without a clean parse; try the whole reply once more
+        fenced = _FENCE_RE.match(buf.decode("utf-8"))
+        return _loads(fenced.group(1) if fenced else buf)
 
     def decide_next_action(self, state: WorkerState) -> Decision:
         """
@@ -212,36 +661,28 @@ Respond with ONLY a JSON object (no markdown, no explanation):
         Returns:
             Decision object describing what to do next
         """
-        # Check if it's break time
-        if self._is_break_time(state.current_time):
-            return Decision(
-                action_type="idle",
-                target="break",
-                parameters={"duration_minutes": 15},
-                reasoning="Scheduled break time"
-            )
-
-        # Check if lunch time
-        if self._is_lunch_time(state.current_time):
-            return Decision(
-                action_type="idle",
-                target="lunch",
-                parameters={"duration_minutes": 60},
-                reasoning="Lunch break"
-            )
-
-        # Check if outside work hours
-        if not self._is_work_hours(state.current_time):
-            return Decision(
-                action_type="end_day",
-                target="shutdown",
-                parameters={},
-                reasoning="Outside work hours"
-            )
-
-        # Try LLM API for intelligent decisions
+        # Scheduled breaks, lunch, being outside work hours and other
+        # clear-cut situations need neither the LLM nor sampling
+        decision = self._rule_decision(state)
+        if decision is not None:
+            self._planned_decisions.clear()
+            return decision
+
+        # Try LLM API for intelligent decisions: follow the current plan,
+        # reuse past answers for situations seen often enough, or ask the
+        # LLM for a new plan
         if self.use_llm:
-            decision = self._llm_decision(state)
+            decision = self._planned_decision(state)
+            if decision is None:
+                key = self._situation_key(state)
+                decision = self._cached_decision(key)
+            if decision is None:
+                plan = self._llm_decision_batch(state)
+                if plan:
+                    decision = plan[0]
+                    self._remember_decision(key, decision)
+                    self._planned_decisions.extend(plan[1:])
+                    self._plan_bucket = self._plan_key(state)
             if decision:
                 return decision
             logger.debug("LLM decision failed, falling back to heuristics")
@@ -249,232 +690,331 @@ Respond with ONLY a JSON object (no markdown, no explanation):
         # Fallback to heuristic-based decisions
         return self._heuristic_decision(state)
 
-    def _heuristic_decision(self, state: WorkerState) -> Decision:
-        """Rule-based decision making with realistic variety."""
-        import random
+    def _direct_decision(self, state: WorkerState) -> Optional[Decision]:
+        """Decide without the LLM or weighting when the next step is obvious."""
+        last = self._recent[-1] if self._recent else None
+
+        if last is None:
+            # First action of a run started at the beginning of the workday
+            now = state.current_time
+            work_start = datetime.combine(now.date(), self._work_start)
+            if not work_start <= now < work_start + START_OF_DAY_WINDOW:
+                return None
+            decision = _START_DAY_DECISION
+        elif state.minutes_since_last_break > 75:
+            decision = self._decide_idle(state)
+        elif self._recent_stats().browse_streak >= 4:
+            # Enough research, back to writing
+            decision = self._decide_document(state)
+        elif (last.action_type == "open_application" and last.target == "outlook"
+              and state.current_time.hour < 10):
+            decision = self._decide_email(state)
+        else:
+            return None
 
-        hour = state.current_time.hour
-        minute = state.current_time.minute
-        actions_count = len(self.action_history)
+        if id(decision) in _SHARED_DECISION_IDS:
+            return replace(decision, reasoning=decision.reasoning + " (direct)")
+        decision.reasoning += " (direct)"
+        return decision
 
-        # Morning routine: Start with email
-        if hour == 9 and minute < 15 and actions_count < 3:
-            state.active_applications.append("outlook")
-            return Decision(
-                action_type="open_application",
-                target="outlook",
-                parameters={"duration_minutes": 5},
-                reasoning="Starting day with email check"
-            )
+    @staticmethod
+    def apply_decision(state: WorkerState, decision: Decision):
+        """
+        Update the worker state for a decision that is being carried out.
 
-        # Weight activities based on time of day and profile
-        weights = self._calculate_activity_weights(state, hour)
+        Deciding never changes the state it is given (so a decision can be
+        computed ahead of time on a copy); the caller applies the effects of
+        the decision it actually takes here.
 
-        # Select activity based on weights
-        activity = random.choices(
-            list(weights.keys()),
-            weights=list(weights.values()),
-            k=1
-        )[0]
+        Args:
+            state: Worker state to update in place
+            decision: The decision being carried out
+        """
+        action_type = decision.action_type
+        if action_type == "open_application":
+            app = decision.target
+        elif action_type == "browse_web":
+            app = "edge"  # Matches lean Windows 11
+        else:
+            if action_type == "idle" and decision.target == "micro_break":
+                state.minutes_since_last_break = 0
+            return
+        if app not in state.active_applications:
+            state.active_applications.append(app)
 
-        return self._create_activity_decision(activity, state)
+    def record_decision(self, decision: Decision):
+        """
+        Add a decision to the action history.
 
-    def _calculate_activity_weights(self, state: WorkerState, hour: int) -> dict:
-        """Calculate weighted probabilities for each activity type."""
-        # Balanced weights favoring document work (typical marketing coordinator)
-        weights = {
-            "email": 18,
-            "browse": 10,  # Reduced - browsing should be occasional, not dominant
-            "spreadsheet": 15,  # Budget reports, data analysis
-            "document": 18,  # Meeting notes, memos, reports
-            "presentation": 10,  # Presentation drafts
-            "application": 8,
-            "file_operation": 9,
-            "download": 5,  # Occasional file downloads (templates, resources)
-            "idle": 10,
-        }
+        Args:
+            decision: The decision that was just taken
+        """
+        if id(decision) in _SHARED_DECISION_IDS:
+            decision = replace(decision, parameters=dict(decision.parameters))
+
+        self._recent.append(decision)
+        self._recent_lines.append(f"- {decision.action_type}: {decision.target} ({decision.reasoning})")
+        self._recent_summary = None
+        self.action_history.append(decision)
+
+    def _recent_stats(self) -> RecentStats:
+        """Summarize the recent window, once per recorded decision."""
+        if self._recent_summary is None:
+            emails = browse = streak = 0
+            for d in self._recent:
+                if d.action_type == "browse_web":
+                    browse += 1
+                    streak += 1
+                    continue
+                streak = 0
+                if d.target == "outlook" and d.action_type in ("check_email", "open_application"):
+                    emails += 1
+            self._recent_summary = RecentStats(
+                emails=emails,
+                browse=browse,
+                browse_streak=streak,
+                last_types=tuple(d.action_type for d in self._recent)[-3:]
+            )
+        return self._recent_summary
 
-        # Adjust weights based on time of day
-        if hour < 10:  # Early morning: email and planning
-            weights["email"] += 15
-            weights["spreadsheet"] += 5
-        elif 10 <= hour < 12:  # Mid-morning: productive document work
-            weights["document"] += 12
-            weights["spreadsheet"] += 8
-            weights["presentation"] += 5
-        elif 12 <= hour < 14:  # Around lunch: lighter tasks
-            weights["browse"] += 5
-            weights["idle"] += 5
-        elif 14 <= hour < 16:  # Afternoon: continued work with some breaks
-            weights["document"] += 8
-            weights["presentation"] += 5
-            weights["idle"] += 3
-        elif hour >= 16:  # Late afternoon: wrapping up, file organization
-            weights["email"] += 10
-            weights["file_operation"] += 8
-
-        # Reduce email weight if checked recently
-        recent_emails = sum(1 for d in self.action_history[-5:]
-                          if d.action_type in ["check_email", "open_application"]
-                          and d.target == "outlook")
-        if recent_emails > 1:
-            weights["email"] = max(5, weights["email"] - 15)
-
-        # Reduce browse weight if browsed recently (prevent browse loops)
-        recent_browse = sum(1 for d in self.action_history[-5:]
-                          if d.action_type == "browse_web")
-        if recent_browse > 1:
-            weights["browse"] = max(3, weights["browse"] - 10)
-
-        # Increase idle weight if working continuously
-        if state.minutes_since_last_break > 45:
-            weights["idle"] += 15
-
-        return weights
+    @staticmethod
+    def _plan_key(state: WorkerState) -> tuple:
+        """The part of the state an LLM plan assumes stays the same."""
+        return (state.current_time.hour, state.minutes_since_last_break > 45)
 
-    def _create_activity_decision(self, activity: str, state: WorkerState) -> Decision:
-        """Create a decision for the selected activity type."""
-        import random
-
-        if activity == "email":
-            if "outlook" not in state.active_applications:
-                state.active_applications.append("outlook")
-                return Decision(
-                    action_type="open_application",
-                    target="outlook",
-                    parameters={"duration_minutes": 5},
-                    reasoning="Opening email client"
-                )
-            return Decision(
-                action_type="check_email",
-                target="outlook",
-                parameters={"action": "check_inbox", "duration_minutes": 3},
-                reasoning="Checking inbox for new messages"
-            )
+    def _planned_decision(self, state: WorkerState) -> Optional[Decision]:
+        """Take the next planned decision, dropping the plan if it no longer fits."""
+        if not self._planned_decisions:
+            return None
+        if self._plan_key(state) != self._plan_bucket:
+            self._planned_decisions.clear()
+            return None
+        return self._planned_decisions.popleft()
+
+    def _situation_key(self, state: WorkerState) -> tuple:
+        """Abstract a state into the situation used as the decision cache key."""
+        now = state.current_time
+        recent = self._recent_stats()
+        return (
+            now.hour,
+            now.minute // 15,
+            recent.last_types,
+            state.minutes_since_last_break > 45,
+            min(recent.browse, 3),
+            min(recent.emails, 3),
+            now.weekday(),
+        )
+
+    def _cached_decision(self, key: tuple) -> Optional[Decision]:
+        """
+        Answer from the decision cache if the situation has enough samples.
 
-        elif activity == "browse":
-            sites = self.profile["activities"]["browser"]["typical_sites"]
-            site = random.choice(sites)
-            # Use Edge instead of Chrome (matches lean Windows 11)
-            if "edge" not in state.active_applications:
-                state.active_applications.append("edge")
-            return Decision(
-                action_type="browse_web",
-                target=site,
-                parameters={"duration_minutes": random.randint(2, 5)},
-                reasoning=f"Researching on {site}"
-            )
+        Returns a copy of a random past decision with its duration varied
+        by up to 20%, or None on a miss.
+        """
+        samples = self._decision_cache.get(key)
+        if samples is None or len(samples) < DECISION_MIN_SAMPLES:
+            return None
+        self._decision_cache.move_to_end(key)
+
+        cached = self._rng.choice(samples)
+        duration = cached.parameters.get("duration_minutes", 5)
+        return Decision(
+            action_type=cached.action_type,
+            target=cached.target,
+            parameters={
+                **cached.parameters,
+                "duration_minutes": max(1, round(duration * self._rng.uniform(0.8, 1.2)))
+            },
+            reasoning=f"{cached.reasoning} (cached)"
+        )
+
+    def _remember_decision(self, key: tuple, decision: Decision):
+        """Add an LLM decision to the cache, evicting the least recent situation."""
+        samples = self._decision_cache.get(key)
+        if samples is None:
+            samples = self._decision_cache[key] = []
+            if len(self._decision_cache) > DECISION_CACHE_SIZE:
+                self._decision_cache.popitem(last=False)
+        else:
+            self._decision_cache.move_to_end(key)
+        samples.append(decision)
+        if len(samples) > DECISION_SAMPLES_PER_KEY:
+            del samples[0]
 
-        elif activity == "spreadsheet":
-            # Use the new edit_spreadsheet action
-            content_types = ["budget", "contacts", "data"]
-            content_type = random.choice(content_types)
-            tasks = ["quarterly budget review", "updating contact list", "analyzing campaign data"]
-            task = random.choice(tasks)
-            return Decision(
-                action_type="edit_spreadsheet",
-                target="spreadsheet",
-                parameters={"content_type": content_type, "duration_minutes": random.randint(5, 15)},
-                reasoning=f"Working on {task}"
-            )
+    def _heuristic_decision(self, state: WorkerState) -> Decision:
+        """Rule-based decision making with realistic variety."""
+        hour = state.current_time.hour
 
-        elif activity == "document":
-            # Use the new create_document action
-            doc_types = ["meeting_notes", "report", "memo"]
-            doc_type = random.choice(doc_types)
-            tasks = self.profile["activities"]["documents"]["common_tasks"]
-            task = random.choice(tasks) if tasks else "drafting document"
-            return Decision(
-                action_type="create_document",
-                target="document",
-                parameters={"doc_type": doc_type, "duration_minutes": random.randint(5, 12)},
-                reasoning=f"Working on {task}"
-            )
+        # Morning routine: Start with email
+        if hour == 9 and state.current_time.minute < 15 and len(self.action_history) < 3:
+            return _START_DAY_DECISION
 
-        elif activity == "presentation":
-            # Use the new create_presentation action
-            topics = ["Q4 Review", "Campaign Update", "Team Meeting", "Strategy Overview"]
-            topic = random.choice(topics)
-            return Decision(
-                action_type="create_presentation",
-                target="presentation",
-                parameters={"topic": topic, "slides": random.randint(5, 10), "duration_minutes": random.randint(8, 15)},
-                reasoning=f"Drafting {topic} presentation"
-            )
+        # Weight activities based on time of day and recent activity
+        key = self._weight_key(state, hour)
 
-        elif activity == "application":
-            apps = self.profile["applications"]["primary"]
-            # Filter out already open apps for variety
-            available = [a for a in apps if a not in state.active_applications]
-            if not available:
-                available = apps
-            app = random.choice(available)
-            state.active_applications.append(app)
-            return Decision(
-                action_type="open_application",
-                target=app,
-                parameters={"duration_minutes": 5},
-                reasoning=f"Opening {app} for work"
-            )
+        # Select activity based on weights
+        activity = self._sample_activity(key)
 
-        elif activity == "file_operation":
-            operations = ["create_file", "copy_file", "move_file"]
-            op = random.choice(operations)
-            return Decision(
-                action_type="file_operation",
-                target=op,
-                parameters={
-                    "path": self.profile["file_paths"]["documents"],
-                    "duration_minutes": 2
-                },
-                reasoning=f"Organizing files ({op})"
-            )
+        return self._create_activity_decision(activity, state)
 
-        elif activity == "download":
-            # Download resources - templates, stock images, data files
-            resources = [
-                ("marketing template", ""),
-                ("stock image", ""),
-                ("data file", ""),
-                ("report template", ""),
-            ]
-            resource_name, url = random.choice(resources)
-            return Decision(
-                action_type="download_file",
-                target=url,  # Empty uses safe defaults in ActionExecutor
-                parameters={"duration_minutes": random.randint(1, 3)},
-                reasoning=f"Downloading {resource_name}"
-            )
+    def _sample_activity(self, key: tuple) -> str:
+        """
+        Pick an activity according to the weight table for key.
 
-        else:  # idle
-            state.minutes_since_last_break = 0
-            return Decision(
-                action_type="idle",
-                target="micro_break",
-                parameters={"duration_minutes": random.randint(2, 5)},
-                reasoning="Taking a short break"
+        Draws sample_batch activities at once and serves them until the
+        weights change, when the remaining samples are discarded.
+        """
+        if key != self._samples_key or not self._samples:
+            activities, cum_weights = _WEIGHT_TABLES[key]
+            self._samples = self._rng.choices(
+                activities,
+                cum_weights=cum_weights,
+                k=self.sample_batch
             )
+            self._samples.reverse()
+            self._samples_key = key
+        return self._samples.pop()
+
+    def _weight_key(self, state: WorkerState, hour: int) -> tuple:
+        """Classify the state into the key of its _WEIGHT_TABLES entry."""
+        recent = self._recent_stats()
+        return (
+            _HOUR_BUCKETS[hour],
+            # Email weight drops if checked recently
+            recent.emails > 1,
+            # Browse weight drops if browsed recently (prevent browse loops)
+            recent.browse > 1,
+            state.minutes_since_last_break > 45,
+        )
 
-    def _is_work_hours(self, current_time: datetime) -> bool:
-        """Check if current time is within work hours."""
-        schedule = self.profile["work_schedule"]
-        start = datetime.strptime(schedule["start_time"], "%H:%M").time()
-        end = datetime.strptime(schedule["end_time"], "%H:%M").time()
-        return start <= current_time.time() <= end
-
-    def _is_lunch_time(self, current_time: datetime) -> bool:
-        """Check if current time is lunch break."""
-        lunch = self.profile["work_schedule"]["lunch_break"]
-        lunch_start = datetime.strptime(lunch["start"], "%H:%M").time()
-        # Simple check - within first 5 minutes of lunch
-        from datetime import timedelta
-        current = current_time.time()
-        return lunch_start <= current <= (datetime.combine(
-            current_time.date(), lunch_start
-        ) + timedelta(minutes=5)).time()
-
-    def _is_break_time(self, current_time: datetime) -> bool:
-        """Check if current time is a scheduled break."""
-        breaks = self.profile["work_schedule"].get("coffee_breaks", [])
-        current = current_time.strftime("%H:%M")
-        return current in breaks
+    def _create_activity_decision(self, activity: str, state: WorkerState) -> Decision:
+        """Create a decision for the selected activity type."""
+        return self._activity_factories.get(activity, self._decide_idle)(state)
+
+    def _decide_email(self, state: WorkerState) -> Decision:
+        """Open Outlook, or check the inbox if it is already open."""
+        if "outlook" not in state.active_applications:
+            return _OUTLOOK_OPEN_DECISION
+        return _EMAIL_CHECK_DECISION
+
+    def _decide_browse(self, state: WorkerState) -> Decision:
+        """Visit one of the profile's typical websites."""
+        site = self._rng.choice(self._browse_sites)
+        # Browses in Edge rather than Chrome (see apply_decision)
+        return Decision(
+            action_type="browse_web",
+            target=site,
+            parameters={"duration_minutes": self._rng.randint(2, 5)},
+            reasoning=f"Researching on {site}"
+        )
+
+    def _decide_spreadsheet(self, state: WorkerState) -> Decision:
+        """Edit a budget, contacts or data spreadsheet."""
+        # Use the new edit_spreadsheet action
+        content_types = ["budget", "contacts", "data"]
+        content_type = self._rng.choice(content_types)
+        tasks = ["quarterly budget review", "updating contact list", "analyzing campaign data"]
+        task = self._rng.choice(tasks)
+        return Decision(
+            action_type="edit_spreadsheet",
+            target="spreadsheet",
+            parameters={"content_type": content_type, "duration_minutes": self._rng.randint(5, 15)},
+            reasoning=f"Working on {task}"
+        )
+
+    def _decide_document(self, state: WorkerState) -> Decision:
+        """Write notes, a report or a memo."""
+        # Use the new create_document action
+        doc_types = ["meeting_notes", "report", "memo"]
+        doc_type = self._rng.choice(doc_types)
+        tasks = self.profile["activities"]["documents"]["common_tasks"]
+        task = self._rng.choice(tasks) if tasks else "drafting document"
+        return Decision(
+            action_type="create_document",
+            target="document",
+            parameters={"doc_type": doc_type, "duration_minutes": self._rng.randint(5, 12)},
+            reasoning=f"Working on {task}"
+        )
+
+    def _decide_presentation(self, state: WorkerState) -> Decision:
+        """Draft a presentation outline."""
+        # Use the new create_presentation action
+        topics = ["Q4 Review", "Campaign Update", "Team Meeting", "Strategy Overview"]
+        topic = self._rng.choice(topics)
+        return Decision(
+            action_type="create_presentation",
+            target="presentation",
+            parameters={"topic": topic, "slides": self._rng.randint(5, 10), "duration_minutes": self._rng.randint(8, 15)},
+            reasoning=f"Drafting {topic} presentation"
+        )
+
+    def _decide_application(self, state: WorkerState) -> Decision:
+        """Open one of the profile's primary applications."""
+        apps = self.profile["applications"]["primary"]
+        # Filter out already open apps for variety
+        available = [a for a in apps if a not in state.active_applications]
+        if not available:
+            available = apps
+        app = self._rng.choice(available)
+        return Decision(
+            action_type="open_application",
+            target=app,
+            parameters={"duration_minutes": 5},
+            reasoning=f"Opening {app} for work"
+        )
+
+    def _decide_file_operation(self, state: WorkerState) -> Decision:
+        """Create, copy or move a file in the documents folder."""
+        operations = ["create_file", "copy_file", "move_file"]
+        op = self._rng.choice(operations)
+        return Decision(
+            action_type="file_operation",
+            target=op,
+            parameters={
+                "path": self.profile["file_paths"]["documents"],
+                "duration_minutes": 2
+            },
+            reasoning=f"Organizing files ({op})"
+        )
+
+    def _decide_download(self, state: WorkerState) -> Decision:
+        """Download a template, image or data file."""
+        # Download resources - templates, stock images, data files
+        resources = [
+            ("marketing template", ""),
+            ("stock image", ""),
+            ("data file", ""),
+            ("report template", ""),
+        ]
+        resource_name, url = self._rng.choice(resources)
+        return Decision(
+            action_type="download_file",
+            target=url,  # Empty uses safe defaults in ActionExecutor
+            parameters={"duration_minutes": self._rng.randint(1, 3)},
+            reasoning=f"Downloading {resource_name}"
+        )
+
+    def _decide_idle(self, state: WorkerState) -> Decision:
+        """Take a short break."""
+        return Decision(
+            action_type="idle",
+            target="micro_break",
+            parameters={"duration_minutes": self._rng.randint(2, 5)},
+            reasoning="Taking a short break"
+        )
+
+    def next_work_start(self, current_time: datetime) -> Optional[datetime]:
+        """
+        Return when the workday starts if current_time is before it.
+
+        Args:
+            current_time: Simulated time to check
+
+        Returns:
+            Start of work hours on the same day, or None if already started
+        """
+        start = self._work_start
+        if current_time.time() < start:
+            return datetime.combine(current_time.date(), start)
+        return None
@@ -5,17 +5,81 @@ This module runs on the Linux container (LXC 140) and communicates
 with the ActionExecutor running on the Windows VM.
 """
 
+import functools
 import json
 import logging
+import os
+import queue
+import select
+import stat
 import subprocess
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Optional
+from types import SimpleNamespace
+from typing import Callable, Optional
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Optional faster JSON codec; orjson.JSONDecodeError subclasses json's
+try:
+    import orjson
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    _loads = json.loads
 
-@dataclass
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+# SSH backends: "subprocess" runs the ssh binary per command, the others
+# keep authenticated connections open in a _ConnectionPool.
+SSH_BACKENDS = ("subprocess", "hussh", "paramiko", "ssh2")
+
+# Seconds an idle OpenSSH ControlMaster connection is kept open
+CONTROL_PERSIST_SECONDS = 600
+
+# Seconds to wait for a new ControlMaster to accept connections
+CONTROL_MASTER_TIMEOUT = 15.0
+
+# Seconds a successful check_windows_ready result is reused
+READY_CACHE_SECONDS = 30.0
+
+
+def _private_control_dir() -> Optional[str]:
+    """
+    Directory for ControlMaster sockets that only this user can write to.
+
+    $XDG_RUNTIME_DIR/sedt, or ~/.ssh/sedt without one. A socket in a
+    shared directory such as /tmp could be planted by another user and
+    take over the session.
+
+    Returns:
+        The directory, or None if it cannot be made private
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    base = runtime_dir if runtime_dir else os.path.expanduser(os.path.join("~", ".ssh"))
+    path = os.path.join(base, "sedt")
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        st = os.lstat(path)
+    except OSError as e:
+        logger.warning(f"Cannot create SSH control directory {path}: {e}")
+        return None
+    if (not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid()
+            or st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)):
+        logger.warning(
+            f"{path} must be a directory owned by this user and not writable by others; "
+            "not sharing an SSH master connection"
+        )
+        return None
+    return path
+
+
+@dataclass(slots=True)
 class ExecutionResult:
     """Result from executing an action on Windows."""
     success: bool
@@ -34,6 +98,245 @@ class ExecutionResult:
         }
 
 
+class _ConnectionPool:
+    """
+    Pool of persistent SSH connections.
+
+    Connections are created lazily (up to `size`) and handed out for
+    exclusive use by one command at a time. A connection that raises
+    while in use is discarded rather than returned to the pool.
+    """
+
+    def __init__(self, factory: Callable, size: int = 1):
+        self._factory = factory
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max(1, size))
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of the block."""
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._factory()
+            try:
+                yield conn
+            except Exception:
+                _close_quietly(conn)
+                raise
+            self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Close all idle connections."""
+        while True:
+            try:
+                _close_quietly(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+def _recv_exact(sock, n: int) -> Optional[bytearray]:
+    """Read exactly n bytes from a socket, or None if it closes first."""
+    buf = bytearray(n)
+    view = memoryview(buf)
+    pos = 0
+    while pos < n:
+        received = sock.recv_into(view[pos:])
+        if not received:
+            return None
+        pos += received
+    return buf
+
+
+def _recv_all(sock) -> bytes:
+    """Read from a socket until the peer closes it."""
+    chunks = []
+    while True:
+        chunk = sock.recv(4096)
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+
+@functools.lru_cache(maxsize=64)
+def _powershell_command(script: str) -> str:
+    """Wrap a script as a quoted ``powershell -Command`` argument (cached per script)."""
+    escaped_script = script.replace('"', '\\"').replace("'", "''")
+    return f'powershell -Command "{escaped_script}"'
+
+
+def _close_quietly(conn):
+    """Close a pooled connection, ignoring errors."""
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class _ParamikoConnection:
+    """
+    A paramiko SSHClient behind the pooled-connection interface.
+
+    Each command opens a channel on the already-authenticated transport.
+    """
+
+    def __init__(self, client, timeout: float = 60):
+        self._client = client
+        self._timeout = timeout
+
+    def execute(self, command: str, input: Optional[bytes] = None) -> SimpleNamespace:
+        """Run a command, optionally feeding it stdin, and return its status, stdout (bytes) and stderr."""
+        stdin, stdout, stderr = self._client.exec_command(command, timeout=self._timeout)
+        if input is not None:
+            stdin.write(input)
+        stdin.close()
+        out = stdout.read()
+        err = stderr.read()
+        return SimpleNamespace(
+            status=stdout.channel.recv_exit_status(),
+            stdout=out,
+            stderr=err.decode("utf-8", errors="replace")
+        )
+
+    def close(self):
+        self._client.close()
+
+
+class _Ssh2Connection:
+    """
+    An ssh2-python (libssh2) session behind the pooled-connection interface.
+
+    The client runs in-process on one socket; each command opens a channel
+    on the authenticated session. libssh2 sessions are not thread-safe,
+    which the pool's one-command-per-connection rule already guarantees.
+    """
+
+    def __init__(self, sock, session):
+        self._sock = sock
+        self._session = session
+
+    def execute(self, command: str, input: Optional[bytes] = None) -> SimpleNamespace:
+        """Run a command, optionally feeding it stdin, and return its status, stdout (bytes) and stderr."""
+        chan = self._session.open_session()
+        try:
+            chan.execute(command)
+            if input is not None:
+                chan.write(input)
+            chan.send_eof()
+            out = self._read_all(chan.read)
+            err = self._read_all(chan.read_stderr)
+            chan.wait_eof()
+        finally:
+            chan.close()
+            chan.wait_closed()
+        return SimpleNamespace(
+            status=chan.get_exit_status(),
+            stdout=out,
+            stderr=err.decode("utf-8", errors="replace")
+        )
+
+    @staticmethod
+    def _read_all(read) -> bytes:
+        """Drain one channel stream (blocking reads return size 0 at EOF)."""
+        chunks = []
+        size, data = read()
+        while size > 0:
+            chunks.append(data)
+            size, data = read()
+        return b"".join(chunks)
+
+    def close(self):
+        try:
+            self._session.disconnect()
+        finally:
+            self._sock.close()
+
+
+class _StdioSession:
+    """
+    One long-running ``action_executor.py --stdio-loop`` behind one ssh process.
+
+    Payloads are written as JSON lines and each reply is read back as one
+    line, so the SSH handshake and interpreter start-up are paid once.
+    The process is (re)started on first use and after it exits, until
+    close(). Requests are serialized, one reply read per payload written.
+    """
+
+    def __init__(self, command: list):
+        self._command = command
+        self._proc: Optional[subprocess.Popen] = None
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def request(self, payload, timeout: float) -> bytes:
+        """Send a payload and return the executor's raw JSON reply line."""
+        with self._lock:
+            if self._closed:
+                raise ConnectionError("Executor session closed")
+            if self._proc is None or self._proc.poll() is not None:
+                self._start()
+            try:
+                self._proc.stdin.write(_dumps(payload) + b"\n")
+                self._proc.stdin.flush()
+                return self._read_line(timeout)
+            except Exception:
+                # A half-read reply would desynchronise the stream; start over
+                self._stop()
+                raise
+
+    def _start(self):
+        self._buffer.clear()
+        self._proc = subprocess.Popen(
+            self._command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0
+        )
+
+    def _read_line(self, timeout: float) -> bytes:
+        fd = self._proc.stdout.fileno()
+        deadline = time.monotonic() + timeout
+        while True:
+            end = self._buffer.find(b"\n")
+            if end >= 0:
+                line = bytes(self._buffer[:end])
+                del self._buffer[:end + 1]
+                return line.strip()
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                raise TimeoutError(f"Executor session timed out after {timeout}s")
+
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise ConnectionError("Executor session closed")
+            self._buffer += chunk
+
+    def _stop(self):
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=5)
+        except Exception:
+            proc.kill()
+            proc.wait()
+        finally:
+            proc.stdout.close()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._stop()
+
+
 class RemoteExecutor:
     """
     Executes actions on a remote Windows VM via SSH.
@@ -52,7 +355,11 @@ class RemoteExecutor:
         ssh_port: int = 22,
         ssh_key_path: Optional[str] = None,
         python_path: str = "python",
-        executor_path: str = "C:\\sedt\\action_executor.py"
+        executor_path: str = "C:\\sedt\\action_executor.py",
+        ssh_backend: str = "subprocess",
+        pool_size: int = 1,
+        max_sessions: int = 10,
+        stdio_loop: bool = True
     ):
         """
         Initialize the remote executor.
@@ -65,7 +372,16 @@ class RemoteExecutor:
             ssh_key_path: Path to SSH private key (optional)
             python_path: Path to Python on Windows
             executor_path: Path to action_executor.py on Windows
+            ssh_backend: One of SSH_BACKENDS (default "subprocess")
+            pool_size: Persistent connections kept open by pooled backends
+            max_sessions: Maximum SSH commands in flight at once
+            stdio_loop: Send SSH-fallback actions through one persistent
+                ``--stdio-loop`` executor instead of one ssh per action
+                (subprocess backend only)
         """
+        if ssh_backend not in SSH_BACKENDS:
+            raise ValueError(f"Unknown SSH backend: {ssh_backend}")
+
         self.windows_host = windows_host
         self.windows_user = windows_user
         self.windows_password = windows_password
@@ -73,8 +389,169 @@ class RemoteExecutor:
         self.ssh_key_path = ssh_key_path
         self.python_path = python_path
         self.executor_path = executor_path
+        self.ssh_backend = ssh_backend
+
+        # Every ssh invocation shares one master connection; %C is OpenSSH's
+        # hash of host, port and user, keeping the socket path short. Without
+        # a private directory each command connects on its own
+        control_dir = _private_control_dir()
+        self._control_path = os.path.join(control_dir, "%C") if control_dir else None
+        self._ssh_prefix = self._build_ssh_prefix()
+
+        self.max_sessions = max(1, max_sessions)
+        self._sessions = threading.BoundedSemaphore(self.max_sessions)
+        self._pool: Optional[_ConnectionPool] = None
+        self._stdio: Optional[_StdioSession] = None
+        self._async_worker: Optional[ThreadPoolExecutor] = None
+        self._concurrent_workers: Optional[ThreadPoolExecutor] = None
+        self._ready_until = 0.0  # time.monotonic() until which the VM counts as ready
+        self._master: Optional[subprocess.Popen] = None
+
+        if ssh_backend == "hussh":
+            self._init_hussh_pool(pool_size)
+        elif ssh_backend == "paramiko":
+            self._init_paramiko_pool(pool_size)
+        elif ssh_backend == "ssh2":
+            self._init_ssh2_pool(pool_size)
+
+        if self._pool is None:
+            self._start_control_master()
+
+        try:
+            self._validate_connection()
+        except ConnectionError:
+            self._stop_control_master()
+            raise
+
+        if stdio_loop and self._pool is None:
+            self._stdio = _StdioSession(self._build_ssh_command(
+                f'{self.python_path} -u {self.executor_path} --stdio-loop',
+                keepalive=True
+            ))
+
+    def _start_control_master(self):
+        """
+        Open the shared ssh connection that later commands multiplex over.
+
+        Waits (up to CONTROL_MASTER_TIMEOUT) until the master answers on
+        its control socket, so the next command joins it instead of opening
+        a second master of its own.
+        """
+        if self._control_path is None:
+            return
+
+        try:
+            self._master = subprocess.Popen(
+                self._build_ssh_command(None, master=True),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+        except OSError as e:
+            logger.warning(f"Could not start SSH master connection: {e}")
+            return
+
+        deadline = time.monotonic() + CONTROL_MASTER_TIMEOUT
+        check = self._control_command("check")
+        while True:
+            try:
+                if subprocess.run(check, capture_output=True, timeout=10).returncode == 0:
+                    return
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+            if self._master.poll() is not None:
+                logger.warning(
+                    f"SSH master connection exited with status {self._master.returncode}"
+                )
+                self._master = None
+                return
+            if time.monotonic() >= deadline:
+                logger.warning("SSH master connection not ready; commands may connect directly")
+                return
+            time.sleep(0.1)
+
+    def _control_command(self, operation: str) -> list:
+        """Build an ``ssh -O`` command for the master connection (check, exit)."""
+        cmd = ["ssh", "-O", operation, "-o", f"ControlPath={self._control_path}"]
+        if self.ssh_port != 22:
+            cmd.extend(["-p", str(self.ssh_port)])
+        cmd.append(f"{self.windows_user}@{self.windows_host}")
+        return cmd
+
+    def _init_hussh_pool(self, pool_size: int):
+        """Set up a pool of hussh connections, or fall back to subprocess."""
+        try:
+            from hussh import Connection
+        except ImportError:
+            logger.warning("hussh package not installed, falling back to subprocess SSH")
+            self.ssh_backend = "subprocess"
+            return
+
+        def connect():
+            kwargs = {"port": self.ssh_port, "username": self.windows_user}
+            if self.ssh_key_path:
+                kwargs["private_key"] = self.ssh_key_path
+            if self.windows_password:
+                kwargs["password"] = self.windows_password
+            return Connection(self.windows_host, **kwargs)
+
+        self._pool = _ConnectionPool(connect, size=pool_size)
+
+    def _init_paramiko_pool(self, pool_size: int):
+        """Set up a pool of paramiko connections, or fall back to subprocess."""
+        try:
+            import paramiko
+        except ImportError:
+            logger.warning("paramiko package not installed, falling back to subprocess SSH")
+            self.ssh_backend = "subprocess"
+            return
+
+        def connect():
+            client = paramiko.SSHClient()
+            # Accept unknown host keys, as the ssh binary does here (lab environment)
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            client.connect(
+                self.windows_host,
+                port=self.ssh_port,
+                username=self.windows_user,
+                password=self.windows_password,
+                key_filename=self.ssh_key_path,
+                timeout=10
+            )
+            client.get_transport().set_keepalive(30)
+            return _ParamikoConnection(client)
+
+        self._pool = _ConnectionPool(connect, size=pool_size)
+
+    def _init_ssh2_pool(self, pool_size: int):
+        """Set up a pool of ssh2-python connections, or fall back to subprocess."""
+        try:
+            from ssh2.session import Session
+        except ImportError:
+            logger.warning("ssh2-python package not installed, falling back to subprocess SSH")
+            self.ssh_backend = "subprocess"
+            return
 
-        self._validate_connection()
+        import socket
+
+        def connect():
+            sock = socket.create_connection((self.windows_host, self.ssh_port), timeout=10)
+            try:
+                session = Session()
+                session.set_timeout(60000)  # Milliseconds; blocks at most this long per call
+                session.handshake(sock)
+                if self.ssh_key_path:
+                    session.userauth_publickey_fromfile(self.windows_user, self.ssh_key_path)
+                elif self.windows_password:
+                    session.userauth_password(self.windows_user, self.windows_password)
+                else:
+                    session.agent_auth(self.windows_user)
+            except Exception:
+                sock.close()
+                raise
+            return _Ssh2Connection(sock, session)
+
+        self._pool = _ConnectionPool(connect, size=pool_size)
 
     def _validate_connection(self):
         """Test SSH connection to Windows VM."""
@@ -88,8 +565,8 @@ class RemoteExecutor:
             logger.error(f"SSH connection failed: {e}")
             raise ConnectionError(f"Cannot connect to Windows VM: {e}")
 
-    def _build_ssh_command(self, remote_command: str) -> list:
-        """Build SSH command with proper arguments."""
+    def _build_ssh_prefix(self) -> tuple:
+        """Build the leading SSH arguments shared by every command."""
         cmd = []
 
         # Use sshpass if password is provided
@@ -110,31 +587,100 @@ class RemoteExecutor:
         cmd.extend([
             "-o", "StrictHostKeyChecking=no",
             "-o", "UserKnownHostsFile=/dev/null",
-            "-o", "LogLevel=ERROR"
+            "-o", "LogLevel=ERROR",
+            "-o", f"ControlPath={self._control_path or 'none'}"
         ])
 
+        return tuple(cmd)
+
+    def _build_ssh_command(
+        self,
+        remote_command: Optional[str],
+        keepalive: bool = False,
+        master: bool = False
+    ) -> list:
+        """
+        Build SSH command with proper arguments.
+
+        Args:
+            remote_command: Command to run on the VM (None for the master)
+            keepalive: Probe the server so a long-lived session notices a dead VM
+            master: Build the command for the shared master connection
+        """
+        cmd = list(self._ssh_prefix)
+
+        # Share one connection: the master owns it, other commands reuse it
+        if master:
+            cmd.extend([
+                "-M", "-N",
+                "-o", "ControlMaster=yes",
+                "-o", f"ControlPersist={CONTROL_PERSIST_SECONDS}"
+            ])
+            keepalive = True
+        else:
+            cmd.extend(["-o", "ControlMaster=auto"])
+
+        # Long-lived sessions probe the server so a dead VM is noticed
+        if keepalive:
+            cmd.extend(["-o", "ServerAliveInterval=30"])
+
         # Add user@host
         cmd.append(f"{self.windows_user}@{self.windows_host}")
 
         # Add the remote command
-        cmd.append(remote_command)
+        if remote_command is not None:
+            cmd.append(remote_command)
 
         return cmd
 
-    def _run_ssh_command(self, remote_command: str, timeout: int = 30) -> str:
-        """Execute a command on the Windows VM via SSH."""
+    def _run_ssh_command(self, remote_command: str, timeout: int = 30,
+                         input: Optional[str] = None) -> str:
+        """Execute a command on the Windows VM via SSH, optionally feeding it stdin."""
+        output = self._run_ssh_bytes(
+            remote_command, timeout, None if input is None else input.encode("utf-8")
+        )
+        return output.decode("utf-8", errors="replace")
+
+    def _run_ssh_bytes(self, remote_command: str, timeout: int = 30,
+                       input: Optional[bytes] = None) -> bytes:
+        """Like _run_ssh_command, but with raw bytes for stdin and stdout."""
+        with self._sessions:
+            if self._pool is not None:
+                return self._run_pooled_command(remote_command, input)
+            return self._run_subprocess_command(remote_command, timeout, input)
+
+    def _run_pooled_command(self, remote_command: str, input: Optional[bytes] = None) -> bytes:
+        """Execute a command on a pooled persistent connection."""
+        with self._pool.connection() as conn:
+            if input is None:
+                result = conn.execute(remote_command)
+            else:
+                result = conn.execute(remote_command, input=input)
+
+        if result.status != 0:
+            raise RuntimeError(f"SSH command failed: {result.stderr}")
+
+        output = result.stdout
+        if isinstance(output, str):  # hussh decodes for us
+            output = output.encode("utf-8")
+        return output.strip()
+
+    def _run_subprocess_command(self, remote_command: str, timeout: int,
+                                input: Optional[bytes] = None) -> bytes:
+        """Execute a command by spawning the ssh binary."""
         cmd = self._build_ssh_command(remote_command)
 
         try:
             result = subprocess.run(
                 cmd,
+                input=input,
                 capture_output=True,
-                text=True,
                 timeout=timeout
             )
 
             if result.returncode != 0:
-                raise RuntimeError(f"SSH command failed: {result.stderr}")
+                stderr = result.stderr.decode("utf-8", errors="replace")
+                raise RuntimeError(f"SSH command failed: {stderr}")
 
             return result.stdout.strip()
 
@@ -170,8 +716,103 @@ class RemoteExecutor:
             # Fall back to SSH
             return self._execute_via_ssh(payload, action_type)
 
+    def execute_async(self, action_type: str, target: str, parameters: dict) -> Future:
+        """
+        Start an action on the Windows VM without waiting for it.
+
+        Actions submitted this way run one at a time, in order, on a
+        background worker.
+
+        Args:
+            action_type: Type of action (e.g., "open_application", "browse_web")
+            target: Target of action (e.g., "chrome", "linkedin.com")
+            parameters: Additional parameters for the action
+
+        Returns:
+            Future resolving to the action's ExecutionResult
+        """
+        if self._async_worker is None:
+            self._async_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="remote")
+        return self._async_worker.submit(self.execute, action_type, target, parameters)
+
+    def execute_concurrent(self, payloads: list) -> list:
+        """
+        Execute independent actions on the Windows VM at the same time.
+
+        Up to max_sessions actions are in flight at once, so their
+        round-trips overlap; use execute_many when order matters.
+
+        Args:
+            payloads: List of {"action_type", "target", "parameters"} dicts
+
+        Returns:
+            List of ExecutionResult, one per payload, in payload order
+        """
+        if not payloads:
+            return []
+
+        if self._concurrent_workers is None:
+            self._concurrent_workers = ThreadPoolExecutor(
+                max_workers=self.max_sessions, thread_name_prefix="remote-concurrent"
+            )
+        return list(self._concurrent_workers.map(
+            lambda p: self.execute(p["action_type"], p["target"], p.get("parameters", {})),
+            payloads
+        ))
+
+    def execute_many(self, payloads: list) -> list:
+        """
+        Execute several actions on the Windows VM in one round-trip.
+
+        The actions run in order on the Windows side. Uses the socket
+        server if running, falling back to a single SSH invocation.
+
+        Args:
+            payloads: List of {"action_type", "target", "parameters"} dicts
+
+        Returns:
+            List of ExecutionResult, one per payload
+        """
+        if not payloads:
+            return []
+
+        try:
+            try:
+                responses = self._socket_request(payloads)
+            except (ConnectionRefusedError, OSError):
+                responses = _loads(self._ssh_request(payloads))
+        except Exception as e:
+            return [
+                ExecutionResult(success=False, action_type=p["action_type"], error=str(e))
+                for p in payloads
+            ]
+
+        # A single error object means the whole batch was rejected
+        if isinstance(responses, dict):
+            responses = [responses] * len(payloads)
+
+        return [
+            self._to_result(response, payload["action_type"])
+            for response, payload in zip(responses, payloads)
+        ]
+
+    @staticmethod
+    def _to_result(response: dict, action_type: str) -> ExecutionResult:
+        """Convert an ActionExecutor response dict to an ExecutionResult."""
+        return ExecutionResult(
+            success=response.get("success", False),
+            action_type=action_type,
+            output=response.get("output", ""),
+            error=response.get("error", ""),
+            duration_ms=response.get("duration_ms", 0)
+        )
+
     def _execute_via_socket(self, payload: dict, action_type: str) -> ExecutionResult:
         """Execute action via socket connection to persistent executor."""
+        return self._to_result(self._socket_request(payload), action_type)
+
+    def _socket_request(self, payload):
+        """Send a payload to the persistent executor and return its decoded reply."""
         import socket
 
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -179,58 +820,39 @@ class RemoteExecutor:
 
         try:
             sock.connect((self.windows_host, 9999))
-            sock.sendall(json.dumps(payload).encode('utf-8'))
-            sock.shutdown(socket.SHUT_WR)
-
-            # Receive response
-            data = b""
-            while True:
-                chunk = sock.recv(4096)
-                if not chunk:
-                    break
-                data += chunk
-
-            response = json.loads(data.decode('utf-8'))
-            return ExecutionResult(
-                success=response.get("success", False),
-                action_type=action_type,
-                output=response.get("output", ""),
-                error=response.get("error", ""),
-                duration_ms=response.get("duration_ms", 0)
-            )
+            data = _dumps(payload)
+            sock.sendall(len(data).to_bytes(4, "big") + data)
+
+            # Receive response: 4-byte big-endian length, then JSON
+            header = _recv_exact(sock, 4)
+            if header is None:
+                raise ConnectionError("Executor closed the connection without replying")
+            if header[:1] == b"{":
+                # Unframed reply from an executor that predates framing
+                data = header + _recv_all(sock)
+            else:
+                data = _recv_exact(sock, int.from_bytes(header, "big"))
+                if data is None:
+                    raise ConnectionError("Executor reply was truncated")
+
+            return _loads(data)
         finally:
             sock.close()
 
     def _execute_via_ssh(self, payload: dict, action_type: str) -> ExecutionResult:
         """Execute action via SSH (original method)."""
-        # Escape the JSON for PowerShell
-        payload_json = json.dumps(payload).replace('"', '\\"')
-
-        # Build the remote command to invoke ActionExecutor
-        remote_cmd = (
-            f'{self.python_path} {self.executor_path} '
-            f'--action "{payload_json}"'
-        )
-
         try:
-            output = self._run_ssh_command(remote_cmd, timeout=60)
+            output = self._ssh_request(payload)
 
             # Parse the JSON response from ActionExecutor
             try:
-                response = json.loads(output)
-                return ExecutionResult(
-                    success=response.get("success", False),
-                    action_type=action_type,
-                    output=response.get("output", ""),
-                    error=response.get("error", ""),
-                    duration_ms=response.get("duration_ms", 0)
-                )
+                return self._to_result(_loads(output), action_type)
             except json.JSONDecodeError:
                 # If not JSON, treat raw output as success
                 return ExecutionResult(
                     success=True,
                     action_type=action_type,
-                    output=output
+                    output=output.decode("utf-8", errors="replace")
                 )
 
         except TimeoutError as e:
@@ -246,6 +868,35 @@ class RemoteExecutor:
                 error=str(e)
             )
 
+    def _ssh_request(self, payload) -> bytes:
+        """Run ActionExecutor over SSH with a payload and return its raw output."""
+        stdio = self._stdio  # close() may clear it from another thread
+        if stdio is not None:
+            try:
+                with self._sessions:
+                    return stdio.request(payload, timeout=60)
+            except ConnectionError as e:
+                # Executor too old for --stdio-loop, or the session died
+                logger.warning(f"Persistent executor session failed ({e}), "
+                               "using one SSH command per action")
+                stdio.close()
+                if self._stdio is stdio:
+                    self._stdio = None
+
+        if self.ssh_backend == "hussh":
+            # hussh can't write to a command's stdin; escape the JSON for PowerShell
+            payload_json = json.dumps(payload).replace('"', '\\"')
+            remote_cmd = (
+                f'{self.python_path} {self.executor_path} '
+                f'--action "{payload_json}"'
+            )
+            return self._run_ssh_bytes(remote_cmd, timeout=60)
+
+        # Send the payload on stdin: no shell quoting, and no command-line
+        # length limit however many actions a batch holds
+        remote_cmd = f'{self.python_path} {self.executor_path} --action -'
+        return self._run_ssh_bytes(remote_cmd, timeout=60, input=_dumps(payload))
+
     def execute_powershell(self, script: str) -> ExecutionResult:
         """
         Execute a PowerShell script directly on the Windows VM.
@@ -258,13 +909,18 @@ class RemoteExecutor:
         Returns:
             ExecutionResult with output
         """
-        # Escape for SSH
-        escaped_script = script.replace('"', '\\"').replace("'", "''")
-
-        remote_cmd = f'powershell -Command "{escaped_script}"'
-
         try:
-            output = self._run_ssh_command(remote_cmd, timeout=60)
+            if self.ssh_backend == "hussh":
+                # hussh can't write to a command's stdin; escape for SSH
+                output = self._run_ssh_command(_powershell_command(script), timeout=60)
+            else:
+                # "-Command -" reads the script from stdin, so it needs no
+                # escaping; the blank line ends any open multi-line block
+                output = self._run_ssh_command(
+                    'powershell -Command -',
+                    timeout=60,
+                    input=script + "\n\n"
+                )
             return ExecutionResult(
                 success=True,
                 action_type="powershell",
@@ -278,24 +934,61 @@ class RemoteExecutor:
             )
 
     def check_windows_ready(self) -> bool:
-        """Check if Windows VM is ready to receive actions."""
+        """
+        Check if Windows VM is ready to receive actions.
+
+        A successful check is reused for READY_CACHE_SECONDS.
+        """
+        if time.monotonic() < self._ready_until:
+            return True
+
         try:
-            # Check if ActionExecutor exists
+            # Check for ActionExecutor and Python in one round-trip
             result = self._run_ssh_command(
-                f'if exist "{self.executor_path}" echo exists'
+                f'if exist "{self.executor_path}" ({self.python_path} --version 2>&1) '
+                f'else echo MISSING'
             )
-            if "exists" not in result:
+            if "MISSING" in result:
                 logger.warning("ActionExecutor not found on Windows VM")
                 return False
-
-            # Check if Python is available
-            result = self._run_ssh_command(f'{self.python_path} --version')
             if "Python" not in result:
                 logger.warning("Python not found on Windows VM")
                 return False
 
+            self._ready_until = time.monotonic() + READY_CACHE_SECONDS
             return True
 
         except Exception as e:
             logger.error(f"Windows readiness check failed: {e}")
             return False
+
+    def close(self):
+        """Close any persistent SSH connections."""
+        if self._async_worker is not None:
+            self._async_worker.shutdown(wait=True)
+            self._async_worker = None
+        if self._concurrent_workers is not None:
+            self._concurrent_workers.shutdown(wait=True)
+            self._concurrent_workers = None
+        if self._stdio is not None:
+            self._stdio.close()
+            self._stdio = None
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+        else:
+            self._stop_control_master()
+
+    def _stop_control_master(self):
+        """Ask the shared ssh master connection to exit."""
+        master, self._master = self._master, None
+        if master is None:
+            return
+
+        try:
+            subprocess.run(self._control_command("exit"), capture_output=True, timeout=10)
+            master.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logger.debug(f"SSH master connection did not exit cleanly: {e}")
+            master.kill()
+            master.wait()
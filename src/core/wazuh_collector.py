@@ -5,35 +5,240 @@ Pulls alerts from Wazuh for validation of detection rules against
 simulated worker activity. Enables programmatic FP/TP analysis.
 """
 
+import gzip
+import hashlib
 import json
 import os
 import logging
+import re
+import threading
+from collections import Counter
+import time
 import requests
-from datetime import datetime, timedelta
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, Optional
 from dataclasses import dataclass, field
 import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Disable SSL warnings for self-signed certs
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 logger = logging.getLogger(__name__)
 
+# Optional faster JSON codec for API responses and Indexer request bodies
+try:
+    import orjson
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+
+# Connections kept open per host (Manager API and Indexer)
+HTTP_POOL_SIZE = 32
+
+# Indexer request bodies at least this large are sent gzip-compressed
+GZIP_BODY_THRESHOLD = 16 * 1024
+
+# Retries for connection errors, throttling (429, honouring Retry-After) and
+# transient 5xx replies; every request the collector makes (including its
+# POST searches) is safe to repeat
+_RETRY_OPTIONS = dict(
+    total=5,
+    backoff_factor=0.25,
+    status_forcelist=(429, 502, 503, 504),
+    allowed_methods=frozenset({"GET", "POST", "DELETE"}),
+    respect_retry_after_header=True,
+    raise_on_status=False
+)
+try:
+    # Random extra delay so concurrent searches don't retry in lockstep
+    HTTP_RETRY = Retry(**_RETRY_OPTIONS, backoff_jitter=0.25)
+except TypeError:  # urllib3 < 2.0 has no backoff_jitter
+    HTTP_RETRY = Retry(**_RETRY_OPTIONS)
+
+# Consecutive failed requests (after retries) that open a service's circuit,
+# and how long requests to it are then refused before one is tried again.
+# Only errors and throttled or 5xx replies count; other 4xx replies don't
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 30.0
+
+# Index pattern holding Wazuh alerts
+ALERT_INDEX = 'wazuh-alerts-*'
+
+# Alerts fetched per search_after page, and how long the indexer keeps the
+# point in time (PIT) alive between pages
+ALERT_PAGE_SIZE = 1000
+PIT_KEEP_ALIVE = '1m'
+
+# Alert fields read by the summary and classification code; searches return
+# only these unless a caller asks for the whole document (fields=None)
+ALERT_SOURCE_FIELDS = (
+    'id',
+    'timestamp',
+    'rule.id',
+    'rule.description',
+    'rule.level',
+    'agent.id',
+    'agent.name',
+    'data',
+    'full_log'
+)
+
+# Response paths kept by the Indexer (filter_path) for each kind of search;
+# everything else (_shards, took, _index, _id, _score, ...) is left out.
+# Each _msearch reply keeps its status so replies stay aligned with searches
+ALERT_PAGE_FILTER = 'hits.hits._source,hits.hits.sort,pit_id'
+ALERT_SEARCH_FILTER = 'hits.hits._source'
+ALERT_MSEARCH_FILTER = 'responses.status,responses.error,responses.hits.hits._source'
+ALERT_AGG_FILTER = (
+    'hits.total.value,'
+    'aggregations.by_rule.buckets.key,'
+    'aggregations.by_rule.buckets.doc_count,'
+    'aggregations.by_rule.buckets.desc.hits.hits._source,'
+    'aggregations.by_severity.buckets.*.doc_count'
+)
+
+# Stand-in for the agent ID in the _msearch search template; replaced per
+# agent in the encoded bytes, so the query is serialized only once
+_AGENT_ID_PLACEHOLDER = '__SEDT_AGENT_ID__'
+
+# Largest from+size a plain search may request (index.max_result_window)
+MAX_RESULT_WINDOW = 10000
+
+# Alert searches run at once when collecting for several agents or windows
+# (never more than the session's pool_maxsize, so none waits for a connection)
+ALERT_FETCH_WORKERS = 8
+
+# Seconds the registered-agent list is reused before asking the API again
+AGENTS_CACHE_SECONDS = 60.0
+
+# Manager API JWT lifetime (Wazuh default) and how long before expiry the
+# token is replaced, so a request never goes out with a token about to lapse
+TOKEN_LIFETIME = timedelta(seconds=900)
+TOKEN_REFRESH_MARGIN = timedelta(seconds=60)
+
+# Substrings marking an alert as SEDT's own infrastructure (setup artifacts)
+INFRA_PATTERNS = (
+    'action_executor',
+    'sedt',
+    'pythonw.exe',
+    'sshd',
+    'wazuh-agent'
+)
+_INFRA_RE = re.compile('|'.join(map(re.escape, INFRA_PATTERNS)), re.IGNORECASE)
+# Same patterns (all ASCII) over an alert's JSON-encoded data field
+_INFRA_RE_BYTES = re.compile(_INFRA_RE.pattern.encode('ascii'), re.IGNORECASE)
+
+# Alert classification -> its counter in classify_alerts' results
+_CLASSIFICATION_KEYS = {
+    'true_positive': 'true_positives',
+    'false_positive': 'false_positives',
+    'infrastructure_noise': 'infrastructure_noise',
+    'unclassified': 'unclassified'
+}
+
+# Wazuh rule level (0-15) -> severity
+_SEVERITY_BY_LEVEL = (
+    ('info',) * 3 + ('low',) * 3 + ('medium',) * 3 + ('high',) * 3 + ('critical',) * 4
+)
+
+# Tokens saved across runs, keyed by API URL and user (readable by owner only)
+TOKEN_CACHE_FILE = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "sedt" / "wazuh_token.json"
+)
+
+
+class _CircuitBreaker:
+    """
+    Stops calling a service that keeps failing.
+
+    After `threshold` consecutive failures the circuit opens and allow()
+    refuses requests for `reset_seconds`. It is then half-open: a single
+    trial request is let through and the rest are refused until its
+    record() closes or re-opens the circuit.
+    """
+
+    def __init__(self, name: str, threshold: int, reset_seconds: float):
+        self.name = name
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self._consecutive_failures = 0
+        self._open_until = 0.0  # time.monotonic() deadline
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now (callers must record() its outcome)."""
+        with self._lock:
+            if self._consecutive_failures < self.threshold:
+                return True
+            if self._trial_in_flight or time.monotonic() < self._open_until:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record(self, ok: bool):
+        """Count the outcome of a request."""
+        with self._lock:
+            self._trial_in_flight = False
+            if ok:
+                self._consecutive_failures = 0
+                return
+            self._consecutive_failures += 1
+            if self._consecutive_failures >= self.threshold:
+                self._open_until = time.monotonic() + self.reset_seconds
+                logger.warning(
+                    f"{self.name}: {self._consecutive_failures} consecutive failures, "
+                    f"pausing requests for {self.reset_seconds:.0f}s"
+                )
+
+
+def _service_ok(status_code: int) -> bool:
+    """Whether a reply shows the service is healthy (for _CircuitBreaker)."""
+    return status_code < 500 and status_code != 429
+
+
+def _data_is_infra(data) -> bool:
+    """Whether an alert's data field mentions one of INFRA_PATTERNS."""
+    if not data:
+        return False
+    try:
+        encoded = _dumps(data)
+    except TypeError:  # Not JSON-serializable (orjson's error subclasses it)
+        return _INFRA_RE.search(str(data)) is not None
+    return _INFRA_RE_BYTES.search(encoded) is not None
 
-@dataclass
+
+def _iso_z(dt: datetime) -> str:
+    """Format a timestamp as YYYY-MM-DDTHH:MM:SSZ for Indexer range queries."""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d}T{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}Z"
+
+
+@dataclass(slots=True)
 class AlertSummary:
     """Summary of alerts from a simulation run."""
     total_alerts: int = 0
-    alerts_by_rule: dict = field(default_factory=dict)
+    alerts_by_rule: dict = field(default_factory=dict)  # Rule key -> alert count
     alerts_by_severity: dict = field(default_factory=dict)
     alert_details: list = field(default_factory=list)
+    alerts_by_rule_ids: dict = field(default_factory=dict)  # Rule key -> alert IDs
 
     def to_dict(self) -> dict:
         return {
             "total_alerts": self.total_alerts,
-            "alerts_by_rule": self.alerts_by_rule,
             "alerts_by_severity": self.alerts_by_severity,
-            "alert_count_by_rule": {k: len(v) for k, v in self.alerts_by_rule.items()}
+            "alert_count_by_rule": dict(self.alerts_by_rule)
         }
 
 
@@ -52,7 +257,9 @@ class WazuhCollector:
         api_password: str = None,
         indexer_username: str = 'admin',
         indexer_password: str = None,
-        verify_ssl: bool = False
+        verify_ssl: bool = False,
+        pool_maxsize: int = HTTP_POOL_SIZE,
+        token_cache: bool = True
     ):
         """
         Initialize Wazuh collector.
@@ -66,6 +273,8 @@ class WazuhCollector:
             indexer_username: Indexer username (default 'admin')
             indexer_password: Indexer password
             verify_ssl: Whether to verify SSL certificates
+            pool_maxsize: HTTP connections kept open per host
+            token_cache: Reuse the Manager API token across runs via TOKEN_CACHE_FILE
         """
         self.api_url = f'https://{wazuh_host}:{api_port}'
         self.indexer_url = f'https://{wazuh_host}:{indexer_port}'
@@ -76,6 +285,44 @@ class WazuhCollector:
         self.verify_ssl = verify_ssl
         self.token = None
         self.token_expiry = None
+        self.token_cache = token_cache
+        if token_cache:
+            self._load_cached_token()
+
+        # Registered agents, and name (upper-case) -> ID, until _agents_expiry
+        self._agents: Optional[list] = None
+        self._agents_by_name: dict = {}
+        self._agents_expiry = 0.0  # time.monotonic() deadline
+
+        # One session for every request, so TCP/TLS connections are reused
+        self.session = requests.Session()
+        self.session.verify = verify_ssl
+        self.pool_maxsize = pool_maxsize
+        adapter = HTTPAdapter(
+            pool_connections=2,  # Manager API and Indexer
+            pool_maxsize=pool_maxsize,
+            max_retries=HTTP_RETRY
+        )
+        self.session.mount(self.api_url, adapter)
+        self.session.mount(self.indexer_url, adapter)
+
+        # Requests fail fast while a service keeps failing
+        self._api_circuit = _CircuitBreaker(
+            'Manager API', CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS
+        )
+        self._indexer_circuit = _CircuitBreaker(
+            'Indexer', CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS
+        )
+
+    def close(self):
+        """Release the pooled HTTP connections."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
     def _authenticate(self) -> bool:
         """
@@ -85,19 +332,19 @@ class WazuhCollector:
             True if authentication successful
         """
         try:
-            response = requests.post(
+            response = self.session.post(
                 f'{self.api_url}/security/user/authenticate',
                 auth=(self.api_username, self.api_password),
-                verify=self.verify_ssl,
                 timeout=30
             )
 
             if response.status_code == 200:
-                data = response.json()
+                data = _loads(response.content)
                 self.token = data['data']['token']
-                # Token expires in 900 seconds (15 min) by default
-                self.token_expiry = datetime.now() + timedelta(seconds=850)
+                self.token_expiry = datetime.now() + TOKEN_LIFETIME
                 logger.info("Wazuh Manager API authentication successful")
+                if self.token_cache:
+                    self._save_cached_token()
                 return True
             else:
                 logger.error(f"Wazuh API auth failed: {response.status_code} - {response.text}")
@@ -107,9 +354,46 @@ class WazuhCollector:
             logger.error(f"Wazuh API auth error: {e}")
             return False
 
+    def _token_cache_key(self) -> str:
+        """Key of this API URL and user's entry in TOKEN_CACHE_FILE."""
+        return hashlib.sha256(f"{self.api_url}\0{self.api_username}".encode()).hexdigest()
+
+    def _load_cached_token(self):
+        """Pick up a still-valid token saved by an earlier run, if any."""
+        try:
+            entry = json.loads(TOKEN_CACHE_FILE.read_text())[self._token_cache_key()]
+            token, expiry = entry['token'], datetime.fromtimestamp(entry['expires'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+
+        if datetime.now() < expiry - TOKEN_REFRESH_MARGIN:
+            self.token = token
+            self.token_expiry = expiry
+
+    def _save_cached_token(self):
+        """Save the current token for later runs, readable by the owner only."""
+        try:
+            try:
+                tokens = json.loads(TOKEN_CACHE_FILE.read_text())
+            except (OSError, ValueError):
+                tokens = {}
+            tokens[self._token_cache_key()] = {
+                'token': self.token,
+                'expires': self.token_expiry.timestamp()
+            }
+
+            TOKEN_CACHE_FILE.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            tmp = TOKEN_CACHE_FILE.with_suffix('.tmp')
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(tokens, f)
+            os.replace(tmp, TOKEN_CACHE_FILE)
+        except OSError as e:
+            logger.debug(f"Could not write token cache: {e}")
+
     def _get_headers(self) -> dict:
         """Get headers with valid JWT token for Manager API."""
-        if self.token is None or datetime.now() >= self.token_expiry:
+        if self.token is None or datetime.now() >= self.token_expiry - TOKEN_REFRESH_MARGIN:
             self._authenticate()
         return {
             'Authorization': f'Bearer {self.token}',
@@ -126,32 +410,54 @@ class WazuhCollector:
             params: Query parameters
 
         Returns:
-            Response data or None on error
+            Response data or None on error (or while the API's circuit is open)
         """
+        if not self._api_circuit.allow():
+            logger.error(f"Manager API request skipped (circuit open): {method} {endpoint}")
+            return None
+
         try:
             url = f'{self.api_url}{endpoint}'
             headers = self._get_headers()
 
-            response = requests.request(
+            response = self.session.request(
                 method=method,
                 url=url,
                 headers=headers,
                 params=params,
-                verify=self.verify_ssl,
                 timeout=60
             )
 
+            if response.status_code == 401 and self._authenticate():
+                # Token revoked or rejected (e.g. a stale cached one); retry once
+                response = self.session.request(
+                    method=method,
+                    url=url,
+                    headers=self._get_headers(),
+                    params=params,
+                    timeout=60
+                )
+
+            self._api_circuit.record(_service_ok(response.status_code))
             if response.status_code == 200:
-                return response.json()
+                return _loads(response.content)
             else:
                 logger.error(f"Manager API request failed: {response.status_code} - {response.text}")
                 return None
 
         except Exception as e:
+            self._api_circuit.record(False)
             logger.error(f"Manager API request error: {e}")
             return None
 
-    def _indexer_request(self, method: str, endpoint: str, json_data: dict = None) -> Optional[dict]:
+    def _indexer_request(
+        self,
+        method: str,
+        endpoint: str,
+        json_data: dict = None,
+        ndjson=None,
+        params: dict = None
+    ) -> Optional[dict]:
         """
         Make authenticated request to Wazuh Indexer (OpenSearch).
 
@@ -159,29 +465,57 @@ class WazuhCollector:
             method: HTTP method (GET, POST, etc.)
             endpoint: API endpoint (e.g., '/wazuh-alerts-*/_search')
             json_data: JSON body for POST requests
+            ndjson: Documents sent as newline-delimited JSON instead (e.g. _msearch),
+                or that body already encoded as bytes
+            params: Query parameters (e.g. filter_path)
+
+        Bodies of GZIP_BODY_THRESHOLD bytes or more are sent gzip-compressed.
 
         Returns:
-            Response data or None on error
+            Response data or None on error (or while the Indexer's circuit is open)
         """
+        if not self._indexer_circuit.allow():
+            logger.error(f"Indexer request skipped (circuit open): {method} {endpoint}")
+            return None
+
         try:
             url = f'{self.indexer_url}{endpoint}'
 
-            response = requests.request(
+            if ndjson is not None:
+                if isinstance(ndjson, bytes):
+                    body = ndjson
+                else:
+                    body = b''.join(_dumps(doc) + b'\n' for doc in ndjson)
+                headers = {'Content-Type': 'application/x-ndjson'}
+            elif json_data is not None:
+                body = _dumps(json_data)
+                headers = {'Content-Type': 'application/json'}
+            else:
+                body, headers = None, {}
+
+            if body is not None and len(body) >= GZIP_BODY_THRESHOLD:
+                body = gzip.compress(body)
+                headers['Content-Encoding'] = 'gzip'
+
+            response = self.session.request(
                 method=method,
                 url=url,
                 auth=(self.indexer_username, self.indexer_password),
-                json=json_data,
-                verify=self.verify_ssl,
+                data=body,
+                headers=headers,
+                params=params,
                 timeout=60
             )
 
+            self._indexer_circuit.record(_service_ok(response.status_code))
             if response.status_code == 200:
-                return response.json()
+                return _loads(response.content)
             else:
                 logger.error(f"Indexer request failed: {response.status_code} - {response.text}")
                 return None
 
         except Exception as e:
+            self._indexer_circuit.record(False)
             logger.error(f"Indexer request error: {e}")
             return None
 
@@ -189,12 +523,24 @@ class WazuhCollector:
         """
         Get list of registered agents.
 
+        The list is reused for AGENTS_CACHE_SECONDS after a successful fetch.
+
         Returns:
             List of agent dictionaries
         """
+        if self._agents is not None and time.monotonic() < self._agents_expiry:
+            return self._agents
+
         result = self._api_request('GET', '/agents')
         if result and 'data' in result:
-            return result['data'].get('affected_items', [])
+            agents = result['data'].get('affected_items', [])
+            self._agents = agents
+            # Reversed so the first agent with a name wins, as a scan would
+            self._agents_by_name = {
+                agent.get('name', '').upper(): agent.get('id') for agent in reversed(agents)
+            }
+            self._agents_expiry = time.monotonic() + AGENTS_CACHE_SECONDS
+            return agents
         return []
 
     def get_agent_id_by_name(self, name: str) -> Optional[str]:
@@ -207,11 +553,8 @@ class WazuhCollector:
         Returns:
             Agent ID or None
         """
-        agents = self.get_agents()
-        for agent in agents:
-            if agent.get('name', '').upper() == name.upper():
-                return agent.get('id')
-        return None
+        self.get_agents()
+        return self._agents_by_name.get(name.upper())
 
     def get_alerts(
         self,
@@ -219,10 +562,11 @@ class WazuhCollector:
         end_time: datetime,
         agent_id: Optional[str] = None,
         agent_name: Optional[str] = None,
-        limit: int = 500
+        limit: int = 500,
+        fields: Optional[tuple] = ALERT_SOURCE_FIELDS
     ) -> list:
         """
-        Pull alerts from Wazuh Indexer for a time window.
+        Pull alerts from Wazuh Indexer for a time window, newest first.
 
         Args:
             start_time: Start of time window
@@ -230,16 +574,156 @@ class WazuhCollector:
             agent_id: Filter by specific agent ID (optional)
             agent_name: Filter by agent name (optional)
             limit: Maximum alerts to return
+            fields: Alert fields to return (None for the whole document)
 
         Returns:
             List of alert dictionaries
         """
+        with closing(self._iter_alerts(start_time, end_time, agent_id, agent_name, limit, fields)) as it:
+            alerts = list(islice(it, limit))
+        logger.info(f"Retrieved {len(alerts)} alerts from {start_time} to {end_time}")
+        return alerts
+
+    def get_alerts_for_agents(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        agent_ids: list,
+        limit: int = 500,
+        fields: Optional[tuple] = ALERT_SOURCE_FIELDS
+    ) -> dict:
+        """
+        Pull alerts for several agents concurrently.
+
+        Each agent's search runs on a worker thread (see get_alerts_batch)
+        over the shared session, so the total time is close to that of the slowest agent
+        rather than the sum.
+
+        Args:
+            start_time: Start of time window
+            end_time: End of time window
+            agent_ids: Agent IDs to collect alerts for
+            limit: Maximum alerts to return per agent
+            fields: Alert fields to return (None for the whole document)
+
+        Returns:
+            Dict of agent ID -> list of alert dictionaries
+        """
+        results = self.get_alerts_batch(
+            [(start_time, end_time, agent_id) for agent_id in agent_ids], limit, fields
+        )
+        return dict(zip(agent_ids, results))
+
+    def get_alerts_batch(
+        self,
+        tasks: list,
+        limit: int = 500,
+        fields: Optional[tuple] = ALERT_SOURCE_FIELDS
+    ) -> list:
+        """
+        Pull alerts for several (time window, agent) pairs concurrently.
+
+        Searches run on up to ALERT_FETCH_WORKERS threads over the shared
+        session, e.g. to collect consecutive windows of a long run at once.
+
+        Args:
+            tasks: (start_time, end_time, agent_id) tuples; agent_id may be None
+            limit: Maximum alerts to return per task
+            fields: Alert fields to return (None for the whole document)
+
+        Returns:
+            List of alert lists, in the order of tasks
+        """
+        if not tasks:
+            return []
+
+        workers = min(ALERT_FETCH_WORKERS, self.pool_maxsize, len(tasks))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(
+                lambda task: self.get_alerts(task[0], task[1], task[2], None, limit, fields),
+                tasks
+            ))
+
+    def get_alerts_multi(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        agent_ids: list,
+        limit: int = 500,
+        fields: Optional[tuple] = ALERT_SOURCE_FIELDS
+    ) -> dict:
+        """
+        Pull alerts for several agents in one _msearch round-trip.
+
+        Args:
+            start_time: Start of time window
+            end_time: End of time window
+            agent_ids: Agent IDs to collect alerts for
+            limit: Maximum alerts per agent (at most MAX_RESULT_WINDOW)
+            fields: Alert fields to return (None for the whole document)
+
+        Returns:
+            Dict of agent ID -> list of alert dictionaries, newest first
+        """
+        if not agent_ids:
+            return {}
+
+        # Every search differs only in the agent ID: encode the pair of lines
+        # once and substitute each (JSON-encoded) ID into the bytes
+        search = {
+            "size": min(limit, MAX_RESULT_WINDOW),
+            "sort": [{"timestamp": {"order": "desc"}}],
+            "track_total_hits": False,
+            "query": self._alert_query(start_time, end_time, _AGENT_ID_PLACEHOLDER)
+        }
+        if fields is not None:
+            search["_source"] = fields
+        template = _dumps({"index": ALERT_INDEX}) + b'\n' + _dumps(search) + b'\n'
+        placeholder = _dumps(_AGENT_ID_PLACEHOLDER)
+        body = b''.join(template.replace(placeholder, _dumps(agent_id)) for agent_id in agent_ids)
+
+        result = self._indexer_request(
+            'POST', '/_msearch', ndjson=body, params={'filter_path': ALERT_MSEARCH_FILTER}
+        )
+        responses = result.get('responses', []) if result else []
+
+        alerts_by_agent = {}
+        for agent_id, response in zip(agent_ids, responses):
+            if 'error' in response:
+                logger.error(f"Alert search for agent {agent_id} failed: {response['error']}")
+                alerts_by_agent[agent_id] = []
+                continue
+            alerts_by_agent[agent_id] = [hit['_source'] for hit in response.get('hits', {}).get('hits', [])]
+
+        # Agents missing from a failed or short reply get no alerts
+        for agent_id in agent_ids:
+            alerts_by_agent.setdefault(agent_id, [])
+
+        logger.info(
+            f"Retrieved {sum(map(len, alerts_by_agent.values()))} alerts for "
+            f"{len(agent_ids)} agents from {start_time} to {end_time}"
+        )
+        return alerts_by_agent
+
+    def _alert_query(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        agent_id: Optional[str] = None,
+        agent_name: Optional[str] = None
+    ) -> dict:
+        """
+        Build the query matching alerts in a time window (and agent).
+
+        Every clause is a filter: nothing is scored, and the indexer can
+        cache the clauses. The agent fields are keywords, so term is an
+        exact lookup.
+        """
         # Format timestamps for Elasticsearch query (ISO 8601)
-        start_str = start_time.strftime('%Y-%m-%dT%H:%M:%SZ')
-        end_str = end_time.strftime('%Y-%m-%dT%H:%M:%SZ')
+        start_str = _iso_z(start_time)
+        end_str = _iso_z(end_time)
 
-        # Build Elasticsearch query
-        must_clauses = [
+        filter_clauses = [
             {
                 "range": {
                     "timestamp": {
@@ -252,91 +736,252 @@ class WazuhCollector:
 
         # Add agent filter if specified
         if agent_id:
-            must_clauses.append({"match": {"agent.id": agent_id}})
+            filter_clauses.append({"term": {"agent.id": agent_id}})
         if agent_name:
-            must_clauses.append({"match": {"agent.name": agent_name}})
+            filter_clauses.append({"term": {"agent.name": agent_name}})
 
-        query = {
-            "size": limit,
-            "sort": [{"timestamp": {"order": "desc"}}],
-            "query": {
-                "bool": {
-                    "must": must_clauses
-                }
-            }
-        }
+        return {"bool": {"filter": filter_clauses}}
 
-        result = self._indexer_request('POST', '/wazuh-alerts-*/_search', query)
+    def _iter_alerts(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        agent_id: Optional[str] = None,
+        agent_name: Optional[str] = None,
+        limit: Optional[int] = None,
+        fields: Optional[tuple] = ALERT_SOURCE_FIELDS
+    ) -> Iterator[dict]:
+        """
+        Stream alerts for a time window, newest first, one page at a time.
 
-        if result and 'hits' in result:
-            alerts = [hit['_source'] for hit in result['hits'].get('hits', [])]
-            total = result['hits'].get('total', {}).get('value', len(alerts))
-            logger.info(f"Retrieved {len(alerts)} alerts (total: {total}) from {start_str} to {end_str}")
-            return alerts
+        Pages are read with search_after against a point in time, so deep
+        result sets cost the same per page and are not capped by the
+        index's max_result_window. Indexers without PIT support fall back
+        to a single search of up to MAX_RESULT_WINDOW alerts.
 
-        return []
+        Args:
+            start_time: Start of time window
+            end_time: End of time window
+            agent_id: Filter by specific agent ID (optional)
+            agent_name: Filter by agent name (optional)
+            limit: Stop after this many alerts (None for all)
+            fields: Alert fields to return (None for the whole document)
+
+        Yields:
+            Alert dictionaries (the hits' _source)
+        """
+        query = self._alert_query(start_time, end_time, agent_id, agent_name)
+        sort = [{"timestamp": {"order": "desc"}}]
+        source = {} if fields is None else {"_source": fields}
+
+        pit = self._indexer_request(
+            'POST', f'/{ALERT_INDEX}/_search/point_in_time',
+            params={'keep_alive': PIT_KEEP_ALIVE, 'filter_path': 'pit_id'}
+        )
+        if not pit or 'pit_id' not in pit:
+            logger.warning("Indexer did not open a point in time; using a single capped search")
+            size = MAX_RESULT_WINDOW if limit is None else min(limit, MAX_RESULT_WINDOW)
+            result = self._indexer_request(
+                'POST', f'/{ALERT_INDEX}/_search',
+                {"size": size, "sort": sort, "track_total_hits": False, "query": query, **source},
+                params={'filter_path': ALERT_SEARCH_FILTER}
+            )
+            if result and 'hits' in result:
+                for hit in result['hits'].get('hits', []):
+                    yield hit['_source']
+            return
+
+        # Alerts often share a timestamp; _shard_doc makes the PIT sort total
+        # so search_after neither skips nor repeats ties between pages
+        sort = sort + [{"_shard_doc": "asc"}]
+        pit_id = pit['pit_id']
+        remaining = limit
+        search_after = None
+        try:
+            while remaining is None or remaining > 0:
+                page_size = ALERT_PAGE_SIZE if remaining is None else min(ALERT_PAGE_SIZE, remaining)
+                body = {
+                    "size": page_size,
+                    "sort": sort,
+                    "track_total_hits": False,
+                    "query": query,
+                    "pit": {"id": pit_id, "keep_alive": PIT_KEEP_ALIVE},
+                    **source
+                }
+                if search_after is not None:
+                    body["search_after"] = search_after
+
+                result = self._indexer_request(
+                    'POST', '/_search', body, params={'filter_path': ALERT_PAGE_FILTER}
+                )
+                # An empty page comes back as {} once filter_path drops the hits
+                if not result or 'hits' not in result:
+                    return
+                hits = result['hits'].get('hits', [])
+                for hit in hits:
+                    yield hit['_source']
+
+                if len(hits) < page_size:
+                    return
+                if remaining is not None:
+                    remaining -= len(hits)
+                search_after = hits[-1]['sort']
+                pit_id = result.get('pit_id', pit_id)
+        finally:
+            self._indexer_request('DELETE', '/_search/point_in_time', {"pit_id": [pit_id]})
 
     def get_alerts_summary(
         self,
         start_time: datetime,
         end_time: datetime,
-        agent_id: Optional[str] = None
+        agent_id=None,
+        limit: Optional[int] = None,
+        details: bool = True
     ) -> AlertSummary:
         """
         Get summarized alerts grouped by rule and severity.
 
+        Alerts are counted as they stream in rather than kept, so memory
+        stays flat however long the window is.
+
         Args:
             start_time: Start of time window
             end_time: End of time window
-            agent_id: Filter by specific agent
+            agent_id: Filter by specific agent, or a list of agents fetched
+                together with one _msearch
+            limit: Maximum alerts to summarize (None for all), per agent
+                when agent_id is a list
+            details: Also fill alert_details and alerts_by_rule_ids
 
         Returns:
             AlertSummary with grouped data
         """
-        alerts = self.get_alerts(start_time, end_time, agent_id)
-
         summary = AlertSummary()
-        summary.total_alerts = len(alerts)
 
-        for alert in alerts:
-            # Group by rule
-            rule_id = alert.get('rule', {}).get('id', 'unknown')
-            rule_desc = alert.get('rule', {}).get('description', 'Unknown rule')
-            rule_key = f"{rule_id}: {rule_desc}"
-
-            if rule_key not in summary.alerts_by_rule:
-                summary.alerts_by_rule[rule_key] = []
-            summary.alerts_by_rule[rule_key].append(alert)
-
-            # Group by severity
-            level = alert.get('rule', {}).get('level', 0)
-            severity = self._level_to_severity(level)
-            summary.alerts_by_severity[severity] = summary.alerts_by_severity.get(severity, 0) + 1
-
-            # Store details
-            summary.alert_details.append({
-                'timestamp': alert.get('timestamp'),
-                'rule_id': rule_id,
-                'rule_description': rule_desc,
-                'level': level,
-                'agent_name': alert.get('agent', {}).get('name'),
-                'data': alert.get('data', {})
-            })
+        if isinstance(agent_id, (list, tuple)):
+            by_agent = self.get_alerts_multi(
+                start_time, end_time, list(agent_id),
+                limit=MAX_RESULT_WINDOW if limit is None else limit
+            )
+            source = (alert for alerts in by_agent.values() for alert in alerts)
+        else:
+            source = self._iter_alerts(start_time, end_time, agent_id, limit=limit)
+
+        # Loop-invariant lookups bound once; the loop runs per alert
+        by_rule = summary.alerts_by_rule
+        by_severity = summary.alerts_by_severity
+        to_severity = self._level_to_severity
+
+        with closing(source) as alerts:
+            for alert in alerts:
+                summary.total_alerts += 1
+
+                # Group by rule
+                rule = alert.get('rule', {})
+                rule_id = rule.get('id', 'unknown')
+                rule_desc = rule.get('description', 'Unknown rule')
+                rule_key = f"{rule_id}: {rule_desc}"
+
+                by_rule[rule_key] = by_rule.get(rule_key, 0) + 1
+
+                # Group by severity
+                level = rule.get('level', 0)
+                severity = to_severity(level)
+                by_severity[severity] = by_severity.get(severity, 0) + 1
+
+                if not details:
+                    continue
+
+                # Store details
+                summary.alerts_by_rule_ids.setdefault(rule_key, []).append(alert.get('id'))
+                summary.alert_details.append({
+                    'timestamp': alert.get('timestamp'),
+                    'rule_id': rule_id,
+                    'rule_description': rule_desc,
+                    'level': level,
+                    'agent_name': alert.get('agent', {}).get('name'),
+                    'data': alert.get('data', {})
+                })
+
+        return summary
+
+    def get_alerts_summary_agg(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        agent_id: Optional[str] = None,
+        max_rules: int = 100
+    ) -> AlertSummary:
+        """
+        Get alert counts by rule and severity, aggregated by the Indexer.
+
+        Only the counts come back over the wire, so alert_details and
+        alerts_by_rule_ids stay empty; use get_alerts_summary for those.
+
+        Args:
+            start_time: Start of time window
+            end_time: End of time window
+            agent_id: Filter by specific agent
+            max_rules: Most frequent rules to count individually
+
+        Returns:
+            AlertSummary with total_alerts, alerts_by_rule and alerts_by_severity
+        """
+        query = {
+            "size": 0,
+            "track_total_hits": True,
+            "query": self._alert_query(start_time, end_time, agent_id),
+            "aggs": {
+                "by_rule": {
+                    "terms": {"field": "rule.id", "size": max_rules},
+                    "aggs": {
+                        "desc": {"top_hits": {"size": 1, "_source": ["rule.description"]}}
+                    }
+                },
+                # Same bands as _level_to_severity
+                "by_severity": {
+                    "range": {
+                        "field": "rule.level",
+                        "keyed": True,
+                        "ranges": [
+                            {"key": "info", "to": 3},
+                            {"key": "low", "from": 3, "to": 6},
+                            {"key": "medium", "from": 6, "to": 9},
+                            {"key": "high", "from": 9, "to": 12},
+                            {"key": "critical", "from": 12}
+                        ]
+                    }
+                }
+            }
+        }
+
+        summary = AlertSummary()
+        result = self._indexer_request(
+            'POST', f'/{ALERT_INDEX}/_search', query, params={'filter_path': ALERT_AGG_FILTER}
+        )
+        if not result or 'aggregations' not in result:
+            return summary
+
+        summary.total_alerts = result['hits']['total']['value']
+
+        # filter_path drops empty arrays and objects, hence the defaults
+        aggregations = result['aggregations']
+        for bucket in aggregations.get('by_rule', {}).get('buckets', []):
+            hits = bucket.get('desc', {}).get('hits', {}).get('hits', [])
+            rule_desc = (hits[0].get('_source', {}).get('rule', {}).get('description', 'Unknown rule')
+                         if hits else 'Unknown rule')
+            summary.alerts_by_rule[f"{bucket['key']}: {rule_desc}"] = bucket['doc_count']
+
+        for severity, bucket in aggregations.get('by_severity', {}).get('buckets', {}).items():
+            if bucket['doc_count']:
+                summary.alerts_by_severity[severity] = bucket['doc_count']
 
         return summary
 
     def _level_to_severity(self, level: int) -> str:
-        """Convert Wazuh rule level to severity string."""
-        if level >= 12:
-            return 'critical'
-        elif level >= 9:
-            return 'high'
-        elif level >= 6:
-            return 'medium'
-        elif level >= 3:
-            return 'low'
-        else:
-            return 'info'
+        """Convert Wazuh rule level (int, float or numeric string) to severity string."""
+        level = int(float(level))
+        return _SEVERITY_BY_LEVEL[min(max(level, 0), len(_SEVERITY_BY_LEVEL) - 1)]
 
     def classify_alerts(
         self,
@@ -364,33 +1009,26 @@ class WazuhCollector:
             'details': []
         }
 
-        # Infrastructure patterns (SEDT setup artifacts)
-        infra_patterns = [
-            'action_executor',
-            'sedt',
-            'pythonw.exe',
-            'sshd',
-            'wazuh-agent'
-        ]
+        search_infra = _INFRA_RE.search
+        counts = Counter()
+        details = results['details']
 
         for alert in alerts:
-            rule_desc = alert.get('rule', {}).get('description', '').lower()
-            data = alert.get('data', {})
-            full_log = alert.get('full_log', '').lower()
-
             classification = 'unclassified'
+            rule = alert.get('rule', {})
 
-            # Check for infrastructure noise
-            for pattern in infra_patterns:
-                if pattern in rule_desc or pattern in full_log or pattern in str(data).lower():
-                    classification = 'infrastructure_noise'
-                    break
+            # Check for infrastructure noise (INFRA_PATTERNS, any case), one
+            # pass per field; the data dict is only encoded if still needed
+            if (search_infra(rule.get('description', ''))
+                    or search_infra(alert.get('full_log', ''))
+                    or _data_is_infra(alert.get('data'))):
+                classification = 'infrastructure_noise'
 
             # If attack was injected and alert matches attack rules, it's TP
             if classification == 'unclassified' and attack_injected:
                 # Check if this alert corresponds to injected attack
                 # For now, mark high-severity alerts during attack runs as potential TP
-                level = alert.get('rule', {}).get('level', 0)
+                level = rule.get('level', 0)
                 if level >= 10:
                     classification = 'true_positive'
                 else:
@@ -400,14 +1038,17 @@ class WazuhCollector:
             if classification == 'unclassified' and not attack_injected:
                 classification = 'false_positive'
 
-            results[classification + 's' if classification != 'infrastructure_noise' else 'infrastructure_noise'] += 1
-            results['details'].append({
-                'rule_id': alert.get('rule', {}).get('id'),
-                'rule_description': alert.get('rule', {}).get('description'),
+            counts[classification] += 1
+            details.append({
+                'rule_id': rule.get('id'),
+                'rule_description': rule.get('description'),
                 'classification': classification,
                 'timestamp': alert.get('timestamp')
             })
 
+        for classification, count in counts.items():
+            results[_CLASSIFICATION_KEYS[classification]] = count
+
         # Calculate rates
         total_relevant = results['true_positives'] + results['false_positives']
         if total_relevant > 0:
@@ -465,8 +1106,8 @@ def test_wazuh_collector():
         print(f"  By severity: {summary.alerts_by_severity}")
         if summary.alerts_by_rule:
             print(f"  Top rules:")
-            for rule, alerts in list(summary.alerts_by_rule.items())[:5]:
-                print(f"    - {rule}: {len(alerts)} alerts")
+            for rule, count in list(summary.alerts_by_rule.items())[:5]:
+                print(f"    - {rule}: {count} alerts")
 
         return True
     else: